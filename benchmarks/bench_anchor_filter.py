@@ -0,0 +1,177 @@
+"""連結過濾的 micro-benchmark
+
+用法: python benchmarks/bench_anchor_filter.py [--anchors N] [--repeat N]
+
+產生大量混合型態的連結（文章、分類、分頁、作者、靜態資源、外部網站、導航文字…），
+比較原本逐一重建規則的過濾迴圈與預先編譯的 AnchorClassifier，並確認兩者結果相同。
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from urllib.parse import urljoin, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import scraper  # noqa: E402
+
+LIST_URL = 'https://fc.bnext.com.tw/category/picks'
+
+HREF_TEMPLATES = [
+    '/article/{n}/some-slug-{n}', '/articles/{n}', '/post/{n}', '/p/{n}', '/news/{n}',
+    '/2025/12/{d}/story-{n}/', '/topic-{n}/long-form', '/category/picks', '/category/ai',
+    '/categories/ai/article/{n}', '/tag/{n}', '/author/writer-{n}', '/page/{d}',
+    '/category/picks?page={d}', '/search?q={n}', '/about', '/static/app-{n}.js',
+    '/images/{n}.jpg', '/feed', '#comments', 'https://other.example.com/article/{n}',
+    'https://fc.bnext.com.tw/category/picks/', '/', '/solutions/{n}', '/list?type={n}',
+]
+TITLES = ['', 'Home', '更多', '下一頁', 'Read more', 'Previous page', '短',
+          '這是一篇關於 AI 的文章標題', 'A reasonably long headline {n}']
+
+
+def _make_soup(count, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    for n in range(count):
+        href = rng.choice(HREF_TEMPLATES).format(n=n, d=rng.randint(1, 28))
+        title = rng.choice(TITLES).format(n=n)
+        parts.append(f'<a href="{href}">{title}</a>')
+    return BeautifulSoup('<html><body>' + ''.join(parts) + '</body></html>', 'lxml')
+
+
+# 原本 fetch_category_with_playwright 內的過濾迴圈（每個連結都重建規則清單並重新編譯日期正規表示式）
+def legacy_filter(soup, list_url):
+    # 通用文章連結偵測：不依賴特定 URL 格式
+    # 策略：選取所有連結，用啟發式規則過濾
+    base_domain = urlparse(list_url).netloc
+    all_anchors = soup.find_all('a', href=True)
+
+    filtered_anchors = []
+    for a in all_anchors:
+        href = a.get('href', '').strip()
+        if not href:
+            continue
+
+        # 取得完整 URL
+        full_url = urljoin(list_url, href)
+        parsed = urlparse(full_url)
+
+        # 過濾規則：
+        # 0. 排除帶有錨點的連結（頁面內跳轉，如「繼續閱讀」）
+        if parsed.fragment:
+            continue
+
+        # 1. 必須是同域名或子域名
+        if not parsed.netloc.endswith(base_domain.replace('www.', '')):
+            continue
+
+        # 2. 排除常見的非文章連結
+        path_lower = parsed.path.lower()
+        path_stripped = parsed.path.rstrip('/')
+
+        # 檢查是否為文章 URL 的明顯特徵
+        has_article_keyword = any(kw in path_lower for kw in ['/article/', '/articles/', '/post/', '/p/', '/news/', '/story/'])
+
+        # 排除清單頁與分頁
+        if full_url.rstrip('/') == list_url.rstrip('/'):
+            continue
+        if not has_article_keyword:
+            path_segments = [p for p in parsed.path.split('/') if p]
+            if parsed.path.lower() in ['/articles', '/article', '/categories', '/category', '/tags', '/tag'] and len(path_segments) <= 1:
+                continue
+            if parsed.query and any(q in parsed.query.lower() for q in ['page=', 'p=', 'offset=']):
+                continue
+
+            # 排除分類/標籤頁（包含但路徑段數少於3的）
+            if any(kw in path_lower for kw in ['/categories/', '/category/', '/tag/', '/tags/']):
+                # /categories/ai 只有2段 -> 排除
+                # /categories/ai/article/123 有4段 -> 保留（但這種情況少見）
+                if len(path_segments) <= 2:
+                    continue
+
+            # 排除作者頁
+            if any(kw in path_lower for kw in ['/author/', '/authors/']):
+                continue
+
+        # 排除其他系統頁面
+        excluded_patterns = [
+            '/page/', '/search', '/login', '/register', '/account',
+            '/cart', '/checkout', '/product',
+            '/privacy', '/terms', '/about', '/contact',
+            '/rss', '/feed', '.xml', '.json',
+            '/wp-admin', '/wp-content', '/wp-includes',
+            '/static/', '/assets/', '/images/', '/img/',
+            '.jpg', '.png', '.gif', '.pdf', '.css', '.js',
+            '/solutions', '/solutions/', '/list?'  # 排除 AI 解方雜貨店和工具清單頁面
+        ]
+        if any(pattern in path_lower for pattern in excluded_patterns):
+            continue
+
+        # 3. 排除首頁和分類頁（路徑太短）
+        path_parts = [p for p in parsed.path.split('/') if p]
+        if len(path_parts) < 1:
+            continue
+
+        # 4. 檢查標題文字
+        title = a.get_text(strip=True)
+
+        # 特殊處理：如果 URL 包含明顯的文章模式，允許沒有標題
+        # /article/, /post/, /p/ 關鍵字
+        has_article_pattern = any(pattern in path_lower for pattern in ['/article/', '/post/', '/p/'])
+
+        # 或日期路徑模式: /2025/12/24/ (年/月/日)
+        import re
+        has_date_pattern = bool(re.search(r'/\d{4}/\d{1,2}/\d{1,2}/', parsed.path))
+
+        if not has_article_pattern and not has_date_pattern:
+            # 非文章 URL，必須有標題文字
+            if not title or len(title) < 5:
+                continue
+
+            # 排除導航類文字
+            nav_keywords = ['上一頁', '下一頁', 'next', 'previous', 'prev', '更多', 'more', '首頁', 'home']
+            if title.lower() in nav_keywords or any(kw in title.lower() for kw in nav_keywords if len(kw) > 3):
+                continue
+
+        filtered_anchors.append(a)
+
+    return filtered_anchors
+
+
+def _best_of(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--anchors', type=int, default=5000)
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+
+    soup = _make_soup(args.anchors)
+    classifier = scraper.AnchorClassifier(LIST_URL)
+
+    old_time, old_result = _best_of(lambda: legacy_filter(soup, LIST_URL), args.repeat)
+    new_time, new_result = _best_of(lambda: scraper._filter_article_anchors(soup, LIST_URL, classifier), args.repeat)
+
+    same = [id(a) for a in old_result] == [id(a) for a in new_result]
+    print(f"連結數: {args.anchors}, 保留: {len(new_result)}")
+    print(f"legacy:     {old_time * 1000:8.2f} ms ({args.anchors / old_time:,.0f} anchors/s)")
+    print(f"classifier: {new_time * 1000:8.2f} ms ({args.anchors / new_time:,.0f} anchors/s)")
+    print(f"speedup: {old_time / new_time:.1f}x, 結果相同: {same}")
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
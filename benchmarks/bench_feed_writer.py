@@ -0,0 +1,137 @@
+"""比較 FeedGenerator 與逐項寫出的 feed 序列化速度，並確認 RSS 輸出相同
+
+用法: python benchmarks/bench_feed_writer.py [--feeds GLOB] [--items N] [--repeat R]
+
+項目取自既有 feed（預設 docs/*.xml），--items 將項目複製（連結加上序號）到 N 筆，模擬累積多時的大型 feed。
+兩種寫法都固定 lastBuildDate：FeedGenerator 在記憶體中建立整份 XML 再與舊檔比較，
+FeedWriter 逐項寫入暫存檔並同時計算雜湊。列出各自耗時與 Python 記憶體峰值。
+"""
+import argparse
+import datetime
+import glob
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from feedgen.feed import FeedGenerator  # noqa: E402
+
+import scraper  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BUILD_DATE = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+CATEGORY = {'name': '未來商務｜精選內容 & <bench>', 'url': 'https://fc.bnext.com.tw/category/picks', 'file': 'bench.xml'}
+
+
+def _load_items(pattern, count):
+    items = []
+    for path in sorted(glob.glob(pattern)):
+        items.extend(scraper._load_existing_feed_items(path))
+    if not items:
+        items = [{
+            'id': 'https://example.com/article/0', 'link': 'https://example.com/article/0',
+            'title': '標題 & <範例>', 'description': '描述 "範例"', 'image': 'https://example.com/a.jpg?x=1&y=2',
+            'pubDate': BUILD_DATE,
+        }]
+    if count:
+        base = items
+        items = []
+        for i in range(count):
+            it = dict(base[i % len(base)])
+            if i >= len(base):
+                it['link'] = it['id'] = f"{it['link']}?copy={i // len(base)}"
+            items.append(it)
+    # XML 由舊到新排列
+    return sorted(items, key=lambda it: scraper._format_datetime_for_feed(it.get('pubDate') or BUILD_DATE))
+
+
+def _feedgen(items, previous_path):
+    # 原本的寫法：建立 FeedGenerator、序列化到 BytesIO，再整份讀入舊檔比較
+    fg = FeedGenerator()
+    fg.id(CATEGORY['url'])
+    fg.title(CATEGORY['name'])
+    fg.link(href=CATEGORY['url'], rel='alternate')
+    fg.description(f"自動抓取的 {CATEGORY['name']} 頻道")
+    fg.language('zh-TW')
+    fg.lastBuildDate(BUILD_DATE)
+    for it in reversed(items):
+        fe = fg.add_entry()
+        fe.id(it.get('id') or it.get('link'))
+        fe.title(it.get('title') or '')
+        if it.get('link'):
+            fe.link(href=it['link'])
+        if it.get('description'):
+            fe.description(it['description'])
+        if it.get('image'):
+            fe.enclosure(it['image'], 0, 'image/*')
+        fe.pubDate(scraper._format_datetime_for_feed(it.get('pubDate')))
+    buf = io.BytesIO()
+    fg.rss_file(buf)
+    content = buf.getvalue()
+    with open(previous_path, 'rb') as fh:
+        unchanged = fh.read() == content
+    return content, unchanged
+
+
+def _writer(items, path, writer_cls):
+    with open(path, 'wb') as fh:
+        writer = writer_cls(fh, CATEGORY, BUILD_DATE)
+        writer.start()
+        for it in items:
+            writer.write_item(it)
+        writer.finish()
+    return writer.hexdigest()
+
+
+def _measure(fn, repeat):
+    best = peak = None
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        _, used = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        best = elapsed if best is None else min(best, elapsed)
+        peak = used if peak is None else max(peak, used)
+    return result, best, peak
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--feeds', default=os.path.join(ROOT, 'docs', '*.xml'))
+    ap.add_argument('--items', type=int, default=0, help='複製項目到 N 筆（預設使用原本的數量）')
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+
+    items = _load_items(args.feeds, args.items)
+    work_dir = tempfile.mkdtemp(prefix='bench-feed-writer-')
+    rss_path = os.path.join(work_dir, 'rss.xml')
+    atom_path = os.path.join(work_dir, 'atom.xml')
+    try:
+        _writer(items, rss_path, scraper.RssWriter)
+        (content, _), old_time, old_peak = _measure(lambda: _feedgen(items, rss_path), args.repeat)
+        _, new_time, new_peak = _measure(lambda: _writer(items, rss_path, scraper.RssWriter), args.repeat)
+        _, atom_time, atom_peak = _measure(lambda: _writer(items, atom_path, scraper.AtomWriter), args.repeat)
+        with open(rss_path, 'rb') as fh:
+            same = fh.read() == content
+
+        print(f"{len(items)} 筆項目，XML {len(content) / 1024:.1f} KiB，重複 {args.repeat} 次取最快")
+        print(f"FeedGenerator  {old_time * 1000:9.2f} ms  記憶體峰值 {old_peak / 1024 / 1024:7.2f} MiB")
+        print(f"RssWriter      {new_time * 1000:9.2f} ms  記憶體峰值 {new_peak / 1024 / 1024:7.2f} MiB  x{old_time / new_time:.1f}")
+        print(f"AtomWriter     {atom_time * 1000:9.2f} ms  記憶體峰值 {atom_peak / 1024 / 1024:7.2f} MiB")
+        print('RSS 輸出與 FeedGenerator 相同' if same else 'RSS 輸出與 FeedGenerator 不同')
+        return 0 if same else 1
+    finally:
+        for path in (rss_path, atom_path):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(work_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""量測匯入 scraper 的啟動成本，並確認較重的套件延後到實際使用時才匯入
+
+用法: python benchmarks/bench_import.py [--repeat N] [--top K]
+
+每次都在新的 Python 程序中量測（避免模組已在 sys.modules 中），分別為：
+直譯器本身、import scraper、import scraper 後再匯入 requests/bs4/playwright/dateutil（即舊版匯入時的成本），
+以及只執行 write_index 的短工作。另以 -X importtime 列出 import scraper 時最耗時的模組。
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+HEAVY_MODULES = ('requests', 'bs4', 'lxml', 'playwright', 'dateutil', 'pytz', 'feedgen')
+
+CASES = [
+    ('import scraper', 'import scraper'),
+    ('import scraper + 重套件', 'import scraper, requests, bs4, lxml, dateutil.parser, playwright.async_api'),
+    ('write_index', 'import scraper, sys; scraper.write_index(sys.argv[1])'),
+]
+
+
+def _run(code, *args, env=None):
+    result = subprocess.run(
+        [sys.executable, '-c', code, *args], cwd=ROOT, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return result
+
+
+def _elapsed(code, *args):
+    # 以程序內的 perf_counter 量測，不包含啟動子程序本身的時間
+    wrapped = f"import time; _t = time.perf_counter()\n{code}\nprint(time.perf_counter() - _t)"
+    return float(_run(wrapped, *args).stdout.strip().splitlines()[-1])
+
+
+def _interpreter(repeat):
+    import time
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _run('pass')
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _importtime(top):
+    stderr = _run('import scraper', env=dict(os.environ, PYTHONPROFILEIMPORTTIME='1')).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        try:
+            rows.append((int(cumulative), name.rstrip()))
+        except ValueError:
+            continue  # 標題列
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--repeat', type=int, default=5)
+    ap.add_argument('--top', type=int, default=10, help='列出 -X importtime 最耗時的前 K 個模組')
+    args = ap.parse_args()
+
+    out_dir = tempfile.mkdtemp(prefix='bench-import-')
+    try:
+        print(f"重複 {args.repeat} 次取最快")
+        print(f"{'python 啟動':24} {_interpreter(args.repeat) * 1000:9.1f} ms（整個子程序）")
+        for label, code in CASES:
+            best = min(_elapsed(code, out_dir) for _ in range(args.repeat))
+            print(f"{label:24} {best * 1000:9.1f} ms")
+
+        print("\nimport scraper 最耗時的模組（累計 µs）:")
+        for cumulative, name in _importtime(args.top):
+            print(f"{cumulative:10d}  {name}")
+
+        loaded = _run(
+            "import scraper, sys; print(' '.join(m for m in sys.argv[1:] if m in sys.modules))", *HEAVY_MODULES,
+        ).stdout.split()
+        if loaded:
+            print(f"\nimport scraper 時已載入: {', '.join(loaded)}")
+            return 1
+        print(f"\nimport scraper 時未載入: {', '.join(HEAVY_MODULES)}")
+        return 0
+    finally:
+        for name in os.listdir(out_dir):
+            os.remove(os.path.join(out_dir, name))
+        os.rmdir(out_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""比較 HTML 解析路徑的速度與結果
+
+用法: python benchmarks/bench_parsing.py FIXTURE_DIR_OR_FILE... [--repeat N]
+
+對每份 HTML 分別以原本的路徑（html.parser 解析整份文件）與目前的路徑
+（parse_html + 只建立需要的節點）擷取文章資訊與列表連結，確認結果相同並列出每份文件的耗時。
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import scraper  # noqa: E402
+
+BASE_URL = 'https://fc.bnext.com.tw/category/picks'
+
+
+def _collect(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, '**', '*.html'), recursive=True)))
+        else:
+            files.append(path)
+    return files
+
+
+def _best_of(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _anchor_hrefs(soup):
+    return [a.get('href') for a in scraper._filter_article_anchors(soup, BASE_URL)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('paths', nargs='+')
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+
+    files = _collect(args.paths)
+    if not files:
+        print('找不到任何 .html 檔案')
+        return 1
+
+    mismatches = 0
+    totals = {'article': [0.0, 0.0], 'list': [0.0, 0.0]}
+    print(f"{'file':32} {'KiB':>7} {'article old/new ms':>20} {'list old/new ms':>20}")
+    for path in files:
+        with open(path, 'r', encoding='utf-8', errors='replace') as fh:
+            html = fh.read()
+
+        cases = {
+            'article': (
+                lambda: scraper._extract_details_from_soup(BeautifulSoup(html, 'html.parser'), BASE_URL),
+                lambda: scraper._extract_article_details(html, BASE_URL),
+            ),
+            'list': (
+                lambda: _anchor_hrefs(BeautifulSoup(html, 'html.parser')),
+                lambda: _anchor_hrefs(scraper.parse_html(html, scraper.LIST_PARSE_TAGS)),
+            ),
+        }
+        columns = []
+        flag = ''
+        for name, (old_fn, new_fn) in cases.items():
+            old_time, old_result = _best_of(old_fn, args.repeat)
+            new_time, new_result = _best_of(new_fn, args.repeat)
+            totals[name][0] += old_time
+            totals[name][1] += new_time
+            if old_result != new_result:
+                mismatches += 1
+                flag = f'  {name} 結果不同!'
+            columns.append(f"{old_time * 1000:8.2f}/{new_time * 1000:<8.2f}({old_time / new_time:.1f}x)")
+        print(f"{os.path.basename(path)[:32]:32} {len(html) / 1024:7.1f} {columns[0]:>20} {columns[1]:>20}{flag}")
+
+    for name, (old_total, new_total) in totals.items():
+        print(f"{name}: {len(files)} 份文件, old={old_total * 1000:.1f}ms, new={new_total * 1000:.1f}ms, "
+              f"speedup={old_total / new_total:.1f}x")
+    print(f"結果不同: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""比較發佈時間解析的速度與結果
+
+用法: python benchmarks/bench_pubdate.py [FIXTURE_DIR_OR_FILE...] [--feeds GLOB] [--repeat N]
+
+樣本來源：既有 feed 的 <pubDate>（預設 docs/*.xml）、指定 HTML 文章頁中的 JSON-LD/meta/<time> 時間，
+以及一組常見的 ISO 8601 寫法。分別以 dateutil 與 PubDateParser 解析，確認結果相同，
+並列出各自耗時與快速路徑命中率。
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from dateutil import parser as date_parser  # noqa: E402
+
+import scraper  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+BUILTIN_SAMPLES = [
+    '2025-12-18T10:00:00+08:00', '2025-12-18T02:00:00Z', '2025-12-18T02:00:00.123Z',
+    '2025-12-18T10:00:00.123456+0800', '2025-12-18 10:00:00', '2025-12-18T10:00',
+    '2025-12-18', '2025-12-18T10:00:00-05:30', 'Thu, 18 Dec 2025 02:00:00 +0000',
+    'Thu, 18 Dec 2025 02:00:00 GMT', '18 Dec 2025 10:00:00 +0800', 'December 18, 2025',
+    '2025/12/18 10:00',
+]
+
+
+def _feed_samples(pattern):
+    samples = []
+    for path in sorted(glob.glob(pattern)):
+        for _, elem in ET.iterparse(path):
+            if elem.tag == 'pubDate' and elem.text:
+                samples.append(('feed', elem.text))
+    return samples
+
+
+def _article_samples(paths):
+    samples = []
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, '**', '*.html'), recursive=True)) if os.path.isdir(path) else [path]
+        for fname in files:
+            with open(fname, 'r', encoding='utf-8', errors='replace') as fh:
+                soup = scraper.parse_html(fh.read(), scraper.ARTICLE_PARSE_TAGS)
+            domain = os.path.basename(os.path.dirname(fname)) or 'article'
+            # 收集 _parse_pubdate_from_soup 會嘗試的所有候選字串
+            for el in soup.find_all('meta'):
+                content = el.get('content')
+                if content and any(k in (el.get('property') or el.get('name') or el.get('itemprop') or '') for k in ('published', 'date', 'pubdate')):
+                    samples.append((domain, content))
+            for t in soup.find_all('time'):
+                samples.append((domain, t.get('datetime') or t.get_text(strip=True)))
+            for script in soup.find_all('script', type='application/ld+json'):
+                for key in ('datePublished', 'publishedDate'):
+                    text = script.string or ''
+                    start = text.find(f'"{key}"')
+                    if start >= 0:
+                        value = text[start:].split(':', 1)[1].split('"')[1]
+                        samples.append((domain, value))
+    return samples
+
+
+def _run(parse, samples):
+    results = []
+    for domain, text in samples:
+        try:
+            results.append(parse(text, domain))
+        except Exception:
+            results.append(None)
+    return results
+
+
+def _same(a, b):
+    if a is None or b is None:
+        return a is b
+    return (a.tzinfo is None) == (b.tzinfo is None) and a == b
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('paths', nargs='*', help='HTML 文章頁檔案或目錄')
+    ap.add_argument('--feeds', default=os.path.join(ROOT, 'docs', '*.xml'))
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+
+    groups = {
+        'feed': _feed_samples(args.feeds),
+        'article': _article_samples(args.paths),
+        'builtin': [('builtin', text) for text in BUILTIN_SAMPLES],
+    }
+
+    mismatches = 0
+    for name, samples in groups.items():
+        if not samples:
+            continue
+        old_best = new_best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            expected = _run(lambda text, domain: date_parser.parse(text), samples)
+            elapsed = time.perf_counter() - start
+            old_best = elapsed if old_best is None else min(old_best, elapsed)
+
+            parser = scraper.PubDateParser()
+            start = time.perf_counter()
+            actual = _run(parser.parse, samples)
+            elapsed = time.perf_counter() - start
+            new_best = elapsed if new_best is None else min(new_best, elapsed)
+
+        for (_, text), a, b in zip(samples, expected, actual):
+            if not _same(a, b):
+                mismatches += 1
+                print(f'  結果不同: {text!r}: dateutil={a!r} fast={b!r}')
+        print(f'{name:8s} {len(samples):6d} 筆  dateutil {old_best * 1000:8.2f} ms  '
+              f'fast {new_best * 1000:8.2f} ms  x{old_best / new_best:5.1f}  ({parser.summary()})')
+
+    print('結果一致' if not mismatches else f'{mismatches} 筆結果不同')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
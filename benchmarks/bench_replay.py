@@ -0,0 +1,316 @@
+"""以錄製的 fixture 離線重播整個抓取流程，量測效能並比對 golden 輸出
+
+用法: python benchmarks/bench_replay.py [FIXTURE_DIR] [--categories N] [--articles M] [--repeat R]
+                                        [--latency] [--update-golden]
+
+FIXTURE_DIR 預設為 benchmarks/fixtures/sample，內容由實際執行時設定 RECORD_FIXTURES 錄製：
+    RECORD_FIXTURES=benchmarks/fixtures/mysite python scraper.py
+
+重播時 Playwright 與 HTTP 請求都改由 fixture 回應（HTTP 以 requests 的 transport adapter 提供），
+其餘流程（列表頁過濾、文章頁擷取、發佈時間解析、合併與寫檔）與實際執行相同。
+時間固定為錄製時間（SCRAPER_NOW），每次重播都從空的輸出目錄開始（初始化模式），
+因此輸出可重現：產生的 XML 必須與 FIXTURE_DIR/golden/ 完全相同，--update-golden 可重新產生。
+
+報告每秒處理頁數、各階段延遲（取自 scraper.METRICS）與記憶體峰值；
+--categories N 會將錄製的 category 複製成 N 份，--articles M 限制每個 category 的文章數（MAX_ITEMS）。
+預設不模擬網路延遲，加上 --latency 時依錄製的耗時等待。
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'sample')
+DEFAULT_ARTICLES = 20
+_ANCHOR_RE = re.compile(r'<a\s[^>]*href', re.IGNORECASE)
+
+
+class Fixtures:
+    """manifest.json 與錄製的回應內容"""
+
+    def __init__(self, root):
+        self.root = root
+        with open(os.path.join(root, 'manifest.json'), 'r', encoding='utf-8') as fh:
+            self.manifest = json.load(fh)
+        self._responses = {}
+        for entry in self.manifest['responses']:
+            self._responses[(entry['via'], entry['url'])] = entry
+        self.served = 0
+
+    def lookup(self, url, via):
+        entry = self._responses.get((via, url))
+        if entry is None and via == 'browser':
+            # 錄製時只以 HTTP 取得的頁面，Playwright 導覽時也提供相同內容；
+            # 反之則不提供，讓 HTTP 請求如錄製時一樣失敗並改用 Playwright
+            entry = self._responses.get(('http', url))
+        if entry is None:
+            return None
+        with open(os.path.join(self.root, entry['body']), 'rb') as fh:
+            body = fh.read()
+        self.served += 1
+        return entry, body
+
+    @staticmethod
+    def decode(entry, body):
+        # HTTP 回應保存原始位元組與解碼用的 encoding；未記錄時（Playwright 頁面、舊的 fixture）為 UTF-8
+        return body.decode(entry.get('encoding') or 'utf-8', errors='replace')
+
+
+def _make_http_adapter(fixtures, latency):
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    class ReplayAdapter(requests.adapters.BaseAdapter):
+        def send(self, request, **kwargs):
+            found = fixtures.lookup(request.url, 'http')
+            resp = requests.Response()
+            resp.url = request.url
+            resp.request = request
+            resp.encoding = 'utf-8'
+            if found is None:
+                resp.status_code = 404
+                resp.headers = CaseInsensitiveDict({'content-type': 'text/plain'})
+                resp._content = b''
+                return resp
+            entry, body = found
+            if latency:
+                time.sleep(entry.get('elapsed') or 0)
+            resp.status_code = entry.get('status') or 200
+            resp.headers = CaseInsensitiveDict(entry.get('headers') or {})
+            resp.encoding = entry.get('encoding') or 'utf-8'
+            resp._content = body
+            return resp
+
+        def close(self):
+            pass
+
+    return ReplayAdapter()
+
+
+class ReplayResponse:
+    def __init__(self, entry):
+        self.status = entry.get('status') or 200
+        self.headers = entry.get('headers') or {}
+
+
+class ReplayPage:
+    """Playwright Page 的替代實作，只提供 scraper 用到的方法"""
+
+    def __init__(self, fixtures, latency):
+        self._fixtures = fixtures
+        self._latency = latency
+        self._html = ''
+
+    async def goto(self, url, wait_until=None, timeout=None):
+        found = self._fixtures.lookup(url, 'browser')
+        if found is None:
+            raise RuntimeError(f'net::ERR_FILE_NOT_FOUND (fixture 中沒有 {url})')
+        entry, body = found
+        if self._latency:
+            await asyncio.sleep(entry.get('elapsed') or 0)
+        self._html = Fixtures.decode(entry, body)
+        return ReplayResponse(entry)
+
+    async def content(self):
+        return self._html
+
+    async def evaluate(self, expression, arg=None):
+        # scraper 只以 evaluate 計算連結數量
+        return len(_ANCHOR_RE.findall(self._html))
+
+    async def wait_for_selector(self, selector, state=None, timeout=None):
+        from bs4 import BeautifulSoup
+        if BeautifulSoup(self._html, 'lxml').select_one(selector) is None:
+            raise TimeoutError(f'找不到 {selector}')
+
+    async def wait_for_function(self, expression, arg=None, timeout=None):
+        if len(_ANCHOR_RE.findall(self._html)) < (arg or 0):
+            raise TimeoutError('連結數量不足')
+
+    async def wait_for_load_state(self, state=None, timeout=None):
+        pass
+
+    async def wait_for_timeout(self, ms):
+        # 固定等待只在模擬延遲時才實際等待
+        await asyncio.sleep(ms / 1000 if self._latency else 0)
+
+    async def close(self):
+        pass
+
+
+class ReplayContext:
+    def __init__(self, fixtures, latency):
+        self._fixtures = fixtures
+        self._latency = latency
+
+    async def new_page(self):
+        return ReplayPage(self._fixtures, self._latency)
+
+    async def route(self, pattern, handler):
+        pass
+
+    def on(self, event, handler):
+        pass
+
+    async def close(self):
+        pass
+
+
+class ReplayBrowser:
+    def __init__(self, fixtures, latency=False):
+        self._fixtures = fixtures
+        self._latency = latency
+
+    async def new_context(self, **kwargs):
+        return ReplayContext(self._fixtures, self._latency)
+
+    async def close(self):
+        pass
+
+
+def _expand_categories(categories, count):
+    # 複製成 N 份（檔名加上序號），用於量測多個 category 同時抓取
+    expanded = []
+    for i in range(count):
+        for cat in categories:
+            if i == 0:
+                expanded.append(dict(cat))
+            else:
+                stem, ext = os.path.splitext(cat['file'])
+                expanded.append(dict(cat, file=f'{stem}-{i}{ext}', name=f"{cat.get('name')} #{i}"))
+    return expanded
+
+
+def _run_once(scraper, fixtures, categories, latency):
+    scraper.METRICS = scraper.RunMetrics()
+    fixtures.served = 0
+    browser = ReplayBrowser(fixtures, latency)
+    tracemalloc.start()
+    start = time.perf_counter()
+    asyncio.run(scraper.run_categories(categories, browser=browser))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, fixtures.served, scraper.METRICS.to_dict()
+
+
+def _max_rss_mib():
+    # 程序的常駐記憶體峰值（包含 lxml 等 C 擴充）；Windows 沒有 resource 模組
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def _stage_latency(report):
+    totals = {}
+    for stages in report['stages'].values():
+        for stage, values in stages.items():
+            entry = totals.setdefault(stage, [0, 0.0, 0.0])
+            entry[0] += values['count']
+            entry[1] += values['total_seconds']
+            entry[2] = max(entry[2], values['max_seconds'])
+    return totals
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('fixture_dir', nargs='?', default=DEFAULT_FIXTURE_DIR)
+    ap.add_argument('--categories', type=int, default=1, help='將錄製的 category 複製成 N 份')
+    ap.add_argument('--articles', type=int, default=DEFAULT_ARTICLES, help='每個 category 最多處理的文章數（MAX_ITEMS）')
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--latency', action='store_true', help='依錄製的耗時模擬網路延遲')
+    ap.add_argument('--update-golden', action='store_true', help='以本次輸出取代 golden 檔案')
+    ap.add_argument('--verbose', action='store_true', help='顯示 scraper 的輸出')
+    args = ap.parse_args()
+
+    fixtures = Fixtures(args.fixture_dir)
+    work_dir = tempfile.mkdtemp(prefix='bench-replay-')
+    os.environ.update({
+        'SCRAPER_NOW': fixtures.manifest['recorded_at'],
+        'MAX_ITEMS': str(args.articles),
+        'ARTICLE_CACHE': 'off',
+        'DOMAIN_RPS': '0',
+        'DOMAIN_MAX_CONCURRENCY': '64',
+        'METRICS_REPORT': 'off',
+    })
+    os.environ.pop('RECORD_FIXTURES', None)
+
+    import scraper
+    scraper._get_http_session().mount('http://', _make_http_adapter(fixtures, args.latency))
+    scraper._get_http_session().mount('https://', _make_http_adapter(fixtures, args.latency))
+    categories = _expand_categories(fixtures.manifest['categories'], args.categories)
+
+    results = []
+    out_dir = None
+    try:
+        for i in range(args.repeat):
+            out_dir = os.path.join(work_dir, f'run{i}')
+            os.environ['OUTPUT_DIR'] = os.path.join(out_dir, 'docs')
+            os.environ['FEED_STORE_DIR'] = os.path.join(out_dir, 'data')
+            if args.verbose:
+                results.append(_run_once(scraper, fixtures, categories, args.latency))
+            else:
+                with open(os.devnull, 'w') as devnull:
+                    stdout, sys.stdout = sys.stdout, devnull
+                    try:
+                        results.append(_run_once(scraper, fixtures, categories, args.latency))
+                    finally:
+                        sys.stdout = stdout
+
+        elapsed, peak, served, report = min(results, key=lambda r: r[0])
+        print(f"{len(categories)} 個 category × 最多 {args.articles} 篇文章，重播 {args.repeat} 次取最快")
+        print(f"耗時 {elapsed:.3f}s，處理 {served} 頁（{served / elapsed:.1f} 頁/秒），Python 記憶體峰值 {peak / 1024 / 1024:.1f} MiB")
+        rss = _max_rss_mib()
+        if rss is not None:
+            print(f"程序常駐記憶體峰值 {rss:.1f} MiB")
+        print(f"{'stage':16} {'count':>6} {'mean ms':>9} {'max ms':>9}")
+        for stage, (count, total, longest) in sorted(_stage_latency(report).items()):
+            print(f"{stage:16} {count:6d} {total / count * 1000:9.2f} {longest * 1000:9.2f}")
+
+        golden_dir = os.path.join(args.fixture_dir, 'golden')
+        outputs = sorted(glob.glob(os.path.join(out_dir, 'docs', '*.xml')))
+        if args.categories != 1 or args.articles != DEFAULT_ARTICLES:
+            # golden 以預設規模（1 份 category、MAX_ITEMS=20）產生
+            print("非預設規模，略過 golden 比對")
+            return 0
+        if args.update_golden:
+            shutil.rmtree(golden_dir, ignore_errors=True)
+            os.makedirs(golden_dir)
+            for path in outputs:
+                shutil.copy(path, golden_dir)
+            print(f"已更新 golden: {golden_dir} ({len(outputs)} 個檔案)")
+            return 0
+
+        expected = sorted(os.path.basename(p) for p in glob.glob(os.path.join(golden_dir, '*.xml')))
+        actual = [os.path.basename(p) for p in outputs]
+        mismatches = sorted(set(expected) ^ set(actual))
+        for name in sorted(set(expected) & set(actual)):
+            with open(os.path.join(golden_dir, name), 'rb') as a, open(os.path.join(out_dir, 'docs', name), 'rb') as b:
+                if a.read() != b.read():
+                    mismatches.append(name)
+        if mismatches:
+            print(f"與 golden 不同: {', '.join(mismatches)}（輸出保留於 {out_dir}）")
+            work_dir = None
+            return 1
+        print(f"輸出與 golden 相同（{len(expected)} 個檔案）")
+        return 0
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
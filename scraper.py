@@ -1,9 +1,21 @@
-import requests # 雖然主體用 Playwright，但 requests 在其他地方可能仍有用，故保留
-from bs4 import BeautifulSoup
-from feedgen.feed import FeedGenerator
+# requests、bs4、playwright 與 dateutil 等較重的套件在實際用到時才匯入，
+# 只需要 write_index、cleanup 或其他輔助函式時，匯入本模組不必付出這些成本
+import asyncio
+import collections
+import contextlib
+import contextvars
 import datetime
+import email.utils
+import hashlib
+import heapq
+import itertools
+import math
 import os
-from playwright.sync_api import sync_playwright
+import signal
+import sys
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
 
 # 讀取 categories.json（若不存在則回退到內建清單）
 import json
@@ -91,20 +103,238 @@ def load_categories(path='categories.json'):
     print("使用預設 categories")
     return DEFAULT_CATEGORIES
 
-# 使用 load_categories() 取得 CATEGORIES
-CATEGORIES = load_categories()
 
+_categories = None
 
 
-from urllib.parse import urljoin
+def get_categories():
+    """categories.json 的內容；第一次使用時才讀取，匯入模組時不做任何事"""
+    global _categories
+    if _categories is None:
+        _categories = load_categories()
+    return _categories
 
 
-def _parse_pubdate_from_soup(art_soup):
+def __getattr__(name):
+    # 相容既有的 scraper.CATEGORIES 用法
+    if name == 'CATEGORIES':
+        return get_categories()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# 執行指標：各階段耗時（依 category 彙總，文章另有逐篇紀錄）與事件次數（逾時、回退、下載量…），
+# 執行結束後輸出 JSON 報告（預設 docs/metrics.json），可另外輸出 Prometheus 文字格式。
+# 目前的 category 以 contextvar 傳遞，asyncio task 與 to_thread 都會沿用，不必逐層傳參數
+_current_category = contextvars.ContextVar('current_category', default=None)
+RUN_SCOPE = 'run'
+
+
+class RunMetrics:
+    """單次執行的結構化指標"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self._start = time.perf_counter()
+        self.timings = {}
+        self.counters = collections.Counter()
+        self.categories = {}
+        self.articles = []
+
+    @staticmethod
+    def _scope():
+        return _current_category.get() or RUN_SCOPE
+
+    @contextlib.contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage, seconds):
+        key = (self._scope(), stage)
+        with self._lock:
+            entry = self.timings.setdefault(key, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[(self._scope(), name)] += value
+
+    def record_article(self, url, source, seconds):
+        with self._lock:
+            self.articles.append({'category': self._scope(), 'url': url, 'source': source, 'seconds': round(seconds, 4)})
+
+    def record_category(self, **fields):
+        with self._lock:
+            self.categories[self._scope()] = fields
+
+    def to_dict(self):
+        stages = collections.defaultdict(dict)
+        for (scope, stage), (count, total, longest) in sorted(self.timings.items()):
+            stages[scope][stage] = {'count': count, 'total_seconds': round(total, 4), 'max_seconds': round(longest, 4)}
+        counters = collections.defaultdict(dict)
+        for (scope, name), value in sorted(self.counters.items()):
+            counters[scope][name] = value
+        return {
+            'started_at': self.started_at.isoformat(),
+            'duration_seconds': round(time.perf_counter() - self._start, 3),
+            'stages': dict(stages),
+            'counters': dict(counters),
+            'categories': self.categories,
+            'articles': self.articles,
+        }
+
+    def to_prometheus(self):
+        def label(value):
+            return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+        data = self.to_dict()
+        lines = [
+            '# HELP scraper_run_duration_seconds 本次執行總耗時',
+            '# TYPE scraper_run_duration_seconds gauge',
+            f"scraper_run_duration_seconds {data['duration_seconds']}",
+            '# HELP scraper_run_started_timestamp_seconds 本次執行開始時間',
+            '# TYPE scraper_run_started_timestamp_seconds gauge',
+            f"scraper_run_started_timestamp_seconds {self.started_at.timestamp():.0f}",
+        ]
+        series = (
+            ('scraper_stage_seconds_total', 'counter', '各階段累計耗時', 'total_seconds'),
+            ('scraper_stage_calls_total', 'counter', '各階段執行次數', 'count'),
+            ('scraper_stage_seconds_max', 'gauge', '各階段單次最長耗時', 'max_seconds'),
+        )
+        for metric, kind, help_text, field in series:
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} {kind}']
+            for scope, stages in data['stages'].items():
+                for stage, values in stages.items():
+                    lines.append(f'{metric}{{category="{label(scope)}",stage="{label(stage)}"}} {values[field]}')
+        lines += ['# HELP scraper_events_total 事件次數與下載量', '# TYPE scraper_events_total counter']
+        for scope, counters in data['counters'].items():
+            for name, value in counters.items():
+                lines.append(f'scraper_events_total{{category="{label(scope)}",event="{label(name)}"}} {value}')
+        lines += ['# HELP scraper_category_items 各 category 的文章數', '# TYPE scraper_category_items gauge']
+        for scope, fields in data['categories'].items():
+            for kind in ('existing', 'old', 'added'):
+                lines.append(f'scraper_category_items{{category="{label(scope)}",kind="{kind}"}} {fields.get(kind, 0)}')
+        lines += ['# HELP scraper_category_peak_rss_mib 各 category 執行期間程序樹的常駐記憶體峰值（MEMORY_BOUNDED）',
+                  '# TYPE scraper_category_peak_rss_mib gauge']
+        for scope, fields in data['categories'].items():
+            if fields.get('peak_rss_mib') is not None:
+                lines.append(f'scraper_category_peak_rss_mib{{category="{label(scope)}"}} {fields["peak_rss_mib"]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, json_path, prometheus_path=None):
+        targets = [(json_path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2) + '\n')]
+        if prometheus_path:
+            targets.append((prometheus_path, self.to_prometheus()))
+        for path, content in targets:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                fh.write(content)
+            os.replace(tmp_path, path)
+            print(f"已輸出執行指標: {path}")
+
+
+METRICS = RunMetrics()
+
+
+# 發佈時間解析：輸入幾乎都是 RFC 822（自己產生的 feed）或 ISO 8601（JSON-LD/meta），
+# 先以快速解析器嘗試，並記住每個網域最近成功的格式，失敗時才交給 dateutil 的啟發式解析
+_ISO8601_RE = re.compile(
+    r'(\d{4})-(\d{2})-(\d{2})'
+    r'(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:[.,](\d+))?)?)?'
+    r'\s*(Z|[+-]\d{2}(?::?\d{2})?)?$',
+    re.IGNORECASE,
+)
+
+
+def _parse_iso8601(text):
+    m = _ISO8601_RE.match(text)
+    if not m:
+        return None
+    year, month, day, hour, minute, second, fraction, tz = m.groups()
+    tzinfo = None
+    if tz:
+        if tz in ('Z', 'z'):
+            tzinfo = datetime.timezone.utc
+        else:
+            digits = tz[1:].replace(':', '')
+            offset = datetime.timedelta(hours=int(digits[:2]), minutes=int(digits[2:] or 0))
+            tzinfo = datetime.timezone(-offset if tz[0] == '-' else offset)
+    return datetime.datetime(
+        int(year), int(month), int(day),
+        int(hour or 0), int(minute or 0), int(second or 0),
+        int((fraction or '0')[:6].ljust(6, '0')), tzinfo,
+    )
+
+
+def _parse_rfc2822(text):
+    try:
+        dt = email.utils.parsedate_to_datetime(text)
+    except (TypeError, ValueError, IndexError):
+        return None
+    # 時區為 -0000 時 email.utils 回傳無時區的時間，dateutil 則視為 UTC；交給 dateutil 以維持相同結果
+    return dt if dt is not None and dt.tzinfo is not None else None
+
+
+class PubDateParser:
+    """先嘗試快速格式、依網域記住成功的格式，失敗才使用 dateutil；並統計命中次數"""
+
+    FORMATS = (('iso8601', _parse_iso8601), ('rfc2822', _parse_rfc2822))
+
+    def __init__(self):
+        self._preferred = {}
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def _formats_for(self, domain):
+        preferred = self._preferred.get(domain)
+        if preferred is None:
+            return self.FORMATS
+        return sorted(self.FORMATS, key=lambda fmt: fmt[0] != preferred)
+
+    def parse(self, text, domain=None):
+        """解析時間字串；無法解析時丟出 ValueError（與 dateutil 相同）"""
+        if not isinstance(text, str):
+            raise ValueError(f'無法解析的時間: {text!r}')
+        value = text.strip()
+        for name, parse in self._formats_for(domain):
+            try:
+                dt = parse(value)
+            except (ValueError, OverflowError):
+                dt = None
+            if dt is not None:
+                self._preferred[domain] = name
+                self.hits += 1
+                return dt
+        from dateutil import parser as date_parser
+        self.misses += 1
+        try:
+            return date_parser.parse(value)
+        except (ValueError, OverflowError):
+            self.failures += 1
+            raise ValueError(f'無法解析的時間: {text!r}')
+
+    def reset_counts(self):
+        # 次數依每次執行統計（與 RunMetrics 相同）；各網域偏好的格式保留
+        self.hits = self.misses = self.failures = 0
+
+    def summary(self):
+        return f"時間解析: 快速路徑={self.hits}, dateutil={self.misses}, 無法解析={self.failures}"
+
+
+PUBDATE_PARSER = PubDateParser()
+
+
+def _parse_pubdate_from_soup(art_soup, domain=None):
     # 嘗試從常見 meta 或 time 標籤解析發佈時間
     # 優先順序: JSON-LD datePublished > article:published_time > og:published_time > <time datetime>
-    from dateutil import parser as date_parser
-    import json
-    import re
 
     # 優先解析 JSON-LD 結構化數據
     json_ld_scripts = art_soup.find_all('script', type='application/ld+json')
@@ -123,13 +353,13 @@ def _parse_pubdate_from_soup(art_soup):
                         # 檢查 datePublished
                         if 'datePublished' in item:
                             try:
-                                return date_parser.parse(item['datePublished'])
+                                return PUBDATE_PARSER.parse(item['datePublished'], domain)
                             except Exception:
                                 pass
                         # 檢查 publishedDate (有些網站用這個)
                         if 'publishedDate' in item:
                             try:
-                                return date_parser.parse(item['publishedDate'])
+                                return PUBDATE_PARSER.parse(item['publishedDate'], domain)
                             except Exception:
                                 pass
         except Exception:
@@ -149,7 +379,7 @@ def _parse_pubdate_from_soup(art_soup):
         el = art_soup.find(tag, attrs=attr)
         if el and el.get('content'):
             try:
-                dt = date_parser.parse(el.get('content'))
+                dt = PUBDATE_PARSER.parse(el.get('content'), domain)
                 return dt
             except Exception:
                 pass
@@ -159,48 +389,63 @@ def _parse_pubdate_from_soup(art_soup):
     if t:
         if t.get('datetime'):
             try:
-                return date_parser.parse(t.get('datetime'))
+                return PUBDATE_PARSER.parse(t.get('datetime'), domain)
             except Exception:
                 pass
         text = t.get_text(strip=True)
         try:
-            return date_parser.parse(text)
+            return PUBDATE_PARSER.parse(text, domain)
         except Exception:
             pass
     return None
 
 
-def _load_existing_feed_items(path):
+def _feed_item_from_element(item, parse_dates=True):
+    link_el = item.find('link')
+    guid_el = item.find('guid')
+    title_el = item.find('title')
+    desc_el = item.find('description')
+    pub_el = item.find('pubDate')
+    enclosure_el = item.find('enclosure')
+    link = (link_el.text.strip() if link_el is not None and link_el.text else None)
+    guid = (guid_el.text.strip() if guid_el is not None and guid_el.text else None)
+    title = (title_el.text if title_el is not None and title_el.text else '')
+    desc = (desc_el.text if desc_el is not None and desc_el.text else '')
+    pub = None
+    if parse_dates and pub_el is not None and pub_el.text:
+        try:
+            # 自己產生的 feed 固定是 RFC 822，以 'feed' 作為格式偏好的鍵
+            pub = PUBDATE_PARSER.parse(pub_el.text, 'feed')
+        except Exception:
+            pub = None
+    image = None
+    if enclosure_el is not None and enclosure_el.get('url'):
+        image = enclosure_el.get('url')
+    return {'id': guid or link, 'link': link, 'title': title, 'description': desc, 'pubDate': pub, 'image': image}
+
+
+def _iter_feed_items(path, parse_dates=True):
+    """以 iterparse 逐一讀取 RSS 項目，處理完即從樹中移除，記憶體不隨 feed 大小成長"""
     import xml.etree.ElementTree as ET
+    parent = None
+    for event, elem in ET.iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            # RSS 項目可能在 channel/item
+            if parent is None and elem.tag == 'channel':
+                parent = elem
+            continue
+        if elem.tag == 'item':
+            yield _feed_item_from_element(elem, parse_dates)
+            if parent is not None:
+                parent.clear()
+
+
+def _load_existing_feed_items(path):
     items = []
     if not os.path.exists(path):
         return items
     try:
-        tree = ET.parse(path)
-        root = tree.getroot()
-        # RSS 項目可能在 channel/item
-        for item in root.findall('.//item'):
-            link_el = item.find('link')
-            guid_el = item.find('guid')
-            title_el = item.find('title')
-            desc_el = item.find('description')
-            pub_el = item.find('pubDate')
-            enclosure_el = item.find('enclosure')
-            link = (link_el.text.strip() if link_el is not None and link_el.text else None)
-            guid = (guid_el.text.strip() if guid_el is not None and guid_el.text else None)
-            title = (title_el.text if title_el is not None and title_el.text else '')
-            desc = (desc_el.text if desc_el is not None and desc_el.text else '')
-            pub = None
-            if pub_el is not None and pub_el.text:
-                try:
-                    from dateutil import parser as date_parser
-                    pub = date_parser.parse(pub_el.text)
-                except Exception:
-                    pub = None
-            image = None
-            if enclosure_el is not None and enclosure_el.get('url'):
-                image = enclosure_el.get('url')
-            items.append({'id': guid or link, 'link': link, 'title': title, 'description': desc, 'pubDate': pub, 'image': image})
+        items = list(_iter_feed_items(path))
     except Exception as e:
         print(f"解析既有 RSS ( {path} ) 發生錯誤: {e}")
     return items
@@ -223,27 +468,1938 @@ def _get_max_feed_items_for_category(cat):
     return DEFAULT_FEED_ITEM_LIMITS.get(cat.get('file'))
 
 
+def _now():
+    """目前時間（UTC）；設定 SCRAPER_NOW（ISO 8601）可固定時間，讓重播 fixture 的輸出可重現"""
+    fixed = os.environ.get('SCRAPER_NOW')
+    if fixed:
+        return _format_datetime_for_feed(datetime.datetime.fromisoformat(fixed))
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
 def _format_datetime_for_feed(dt):
     if dt is None:
-        return datetime.datetime.now(datetime.timezone.utc)
+        return _now()
     if dt.tzinfo is None:
         return dt.replace(tzinfo=datetime.timezone.utc)
     return dt.astimezone(datetime.timezone.utc)
 
 
-def fetch_category_with_playwright(cat):
+# 直接逐項寫出 feed（不經過 FeedGenerator 建立整棵 lxml 樹）。RSS 2.0 輸出與 FeedGenerator.rss_file() 相同：
+# 無縮排、頻道欄位順序、guid isPermaLink="false"、enclosure length="0" 等皆與 feedgen 一致
+RSS_DOCS_URL = 'http://www.rssboard.org/rss-specification'
+RSS_GENERATOR = 'python-feedgen'  # 沿用 feedgen 的值，既有 RSS 的內容雜湊不變、不會全部重寫
+ATOM_GENERATOR = 'rsslinks'
+_RSS_HEAD = (
+    "<?xml version='1.0' encoding='UTF-8'?>\n"
+    '<rss xmlns:atom="http://www.w3.org/2005/Atom" xmlns:content="http://purl.org/rss/1.0/modules/content/" version="2.0">'
+)
+_ATOM_HEAD = (
+    "<?xml version='1.0' encoding='UTF-8'?>\n"
+    '<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="zh-TW">'
+)
+_XML_INVALID_CHARS_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+
+def _xml_text(value):
+    # 與 lxml 相同的跳脫規則
+    if _XML_INVALID_CHARS_RE.search(value):
+        raise ValueError('All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters')
+    return value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('\r', '&#13;')
+
+
+def _xml_attr(value):
+    return _xml_text(value).replace('"', '&quot;').replace('\n', '&#10;').replace('\t', '&#9;')
+
+
+_RFC2822_DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_RFC2822_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def _format_rfc2822(dt):
+    # 與 email.utils.format_datetime 相同（一律轉為 UTC，時區寫成 +0000），但不經過 strftime
+    dt = _format_datetime_for_feed(dt)
+    return (f"{_RFC2822_DAYS[dt.weekday()]}, {dt.day:02d} {_RFC2822_MONTHS[dt.month - 1]} {dt.year:04d} "
+            f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d} +0000")
+
+
+def _format_iso8601(dt):
+    return _format_datetime_for_feed(dt).isoformat()
+
+
+class FeedWriter:
+    """逐項寫出 feed 到二進位檔案物件，同時計算內容雜湊
+
+    雜湊不含產生時間（lastBuildDate / updated），寫完即可與上次記錄的雜湊比較是否有變動，
+    不必把整份內容留在記憶體，也不必重新讀取舊檔。另外計算整個檔案的雜湊，寫入 feeds.json。
+    """
+
+    def __init__(self, fh, cat, build_date=None):
+        self._fh = fh
+        self._cat = cat
+        self._build_date = build_date or _now()
+        self._hash = hashlib.sha256()
+        self._file_hash = hashlib.sha256()
+
+    def _write(self, text, hashed=True):
+        data = text.encode('utf-8')
+        if hashed:
+            self._hash.update(data)
+        self._file_hash.update(data)
+        self._fh.write(data)
+
+    def _description(self):
+        cat = self._cat
+        return cat.get('description') or f"自動抓取的 {cat.get('name')} 頻道"
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def file_hexdigest(self):
+        return self._file_hash.hexdigest()
+
+
+class RssWriter(FeedWriter):
+    """RSS 2.0"""
+
+    def start(self):
+        cat = self._cat
+        self._write(
+            _RSS_HEAD
+            + '<channel>'
+            + f"<title>{_xml_text(cat.get('name') or 'RSS')}</title>"
+            + f"<link>{_xml_text(cat['url'])}</link>"
+            + f"<description>{_xml_text(self._description())}</description>"
+            + f"<docs>{RSS_DOCS_URL}</docs>"
+            + f"<generator>{RSS_GENERATOR}</generator>"
+            + '<language>zh-TW</language>'
+        )
+        self._write(f"<lastBuildDate>{_format_rfc2822(self._build_date)}</lastBuildDate>", hashed=False)
+
+    def write_item(self, it):
+        title = it.get('title') or ''
+        description = it.get('description') or ''
+        if not title and not description:
+            raise ValueError('Required fields not set')
+        parts = ['<item>']
+        if title:
+            parts.append(f"<title>{_xml_text(title)}</title>")
+        if it.get('link'):
+            parts.append(f"<link>{_xml_text(it['link'])}</link>")
+        if description:
+            parts.append(f"<description>{_xml_text(description)}</description>")
+        guid = it.get('id') or it.get('link')
+        if guid:
+            parts.append(f'<guid isPermaLink="false">{_xml_text(guid)}</guid>')
+        if it.get('image'):
+            parts.append(f'<enclosure url="{_xml_attr(it["image"])}" length="0" type="image/*"/>')
+        parts.append(f"<pubDate>{_format_rfc2822(it.get('pubDate'))}</pubDate>")
+        parts.append('</item>')
+        self._write(''.join(parts))
+
+    def finish(self):
+        self._write('</channel></rss>')
+
+
+class AtomWriter(FeedWriter):
+    """Atom 1.0；欄位對應與 RSS 相同（description → summary，圖片 → enclosure 連結）
+
+    RFC 4287 要求 feed 或每個 entry 都有 author，項目沒有作者資訊，因此在 feed 層級以來源名稱
+    （沒有名稱時為網站網域）作為 author。
+    """
+
+    def start(self):
+        cat = self._cat
+        author = cat.get('name') or urlparse(cat['url']).netloc or 'RSS'
+        self._write(
+            _ATOM_HEAD
+            + f"<id>{_xml_text(cat['url'])}</id>"
+            + f"<title>{_xml_text(cat.get('name') or 'RSS')}</title>"
+            + f'<link href="{_xml_attr(cat["url"])}" rel="alternate"/>'
+            + f"<author><name>{_xml_text(author)}</name></author>"
+            + f"<generator>{ATOM_GENERATOR}</generator>"
+            + f"<subtitle>{_xml_text(self._description())}</subtitle>"
+        )
+        self._write(f"<updated>{_format_iso8601(self._build_date)}</updated>", hashed=False)
+
+    def write_item(self, it):
+        title = it.get('title') or ''
+        description = it.get('description') or ''
+        if not title and not description:
+            raise ValueError('Required fields not set')
+        published = _format_iso8601(it.get('pubDate'))
+        parts = ['<entry>', f"<id>{_xml_text(it.get('id') or it.get('link') or '')}</id>", f"<title>{_xml_text(title)}</title>"]
+        parts.append(f"<updated>{published}</updated>")
+        if it.get('link'):
+            parts.append(f'<link href="{_xml_attr(it["link"])}" rel="alternate"/>')
+        if description:
+            parts.append(f"<summary>{_xml_text(description)}</summary>")
+        if it.get('image'):
+            parts.append(f'<link href="{_xml_attr(it["image"])}" rel="enclosure" type="image/*" length="0"/>')
+        parts.append(f"<published>{published}</published>")
+        parts.append('</entry>')
+        self._write(''.join(parts))
+
+    def finish(self):
+        self._write('</feed>')
+
+
+FEED_WRITERS = {'rss': RssWriter, 'atom': AtomWriter}
+DEFAULT_FEED_FORMAT = 'rss'
+
+
+def _get_feed_format(cat):
+    # categories.json 的 feed_format 優先，其次環境變數 FEED_FORMAT（rss / atom）
+    fmt = str(cat.get('feed_format') or os.environ.get('FEED_FORMAT', DEFAULT_FEED_FORMAT)).lower()
+    return fmt if fmt in FEED_WRITERS else DEFAULT_FEED_FORMAT
+
+
+# feed 項目儲存：每個 category 一個 JSON Lines 檔（預設 data/<檔名>.jsonl），是 feed 內容的來源。
+# 項目依 pubDate 由舊到新排列，時間存為 epoch 秒數；XML 由此產生，不必再解析自己寫出的 XML，
+# 也能在不重新抓取的情況下重新輸出（python scraper.py --render）。
+# 旁邊的 <檔名>.meta.json 記錄上次寫出的 XML 雜湊與大小，用來判斷內容是否有變動，
+# 上次完整處理時列表頁的指紋（列表頁未變動時可略過整個 category），
+# 以及整個 XML 檔的雜湊、項目數與最新 pubDate（產生 feeds.json 時不必重新讀取 XML）
+DEFAULT_FEED_STORE_DIR = 'data'
+
+
+class FeedStore:
+    """單一 category 的 feed 項目儲存"""
+
+    def __init__(self, path):
+        self.path = path
+
+    @classmethod
+    def for_category(cls, cat):
+        store_dir = os.environ.get('FEED_STORE_DIR', DEFAULT_FEED_STORE_DIR)
+        return cls(os.path.join(store_dir, os.path.splitext(cat['file'])[0] + '.jsonl'))
+
+    @property
+    def meta_path(self):
+        return os.path.splitext(self.path)[0] + '.meta.json'
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load_meta(self):
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def save_meta(self, meta):
+        os.makedirs(os.path.dirname(self.meta_path) or '.', exist_ok=True)
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(meta, fh, sort_keys=True)
+            fh.write('\n')
+        os.replace(tmp_path, self.meta_path)
+
+    def list_unchanged(self, output_path, fingerprint):
+        """列表頁指紋與上次完整處理時相同，且 XML 仍是上次寫出的檔案"""
+        meta = self.load_meta()
+        if meta.get('list_fingerprint') != fingerprint or not os.path.exists(output_path):
+            return False
+        return meta.get('size') is None or meta['size'] == os.path.getsize(output_path)
+
+    def save_list_fingerprint(self, fingerprint):
+        self.save_meta(dict(self.load_meta(), list_fingerprint=fingerprint))
+
+    def _iter_records(self):
+        if not self.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_items(self):
+        for rec in self._iter_records():
+            pub = rec.get('pub')
+            yield {
+                'id': rec.get('id'),
+                'link': rec.get('link'),
+                'title': rec.get('title') or '',
+                'description': rec.get('description') or '',
+                'pubDate': datetime.datetime.fromtimestamp(pub, datetime.timezone.utc) if pub is not None else None,
+                'image': rec.get('image'),
+            }
+
+    def ids(self):
+        """已存在檢查用的索引（guid 與 link），不轉換日期"""
+        ids = set()
+        for rec in self._iter_records():
+            for key in (rec.get('id'), rec.get('link')):
+                if key:
+                    ids.add(key)
+        return ids
+
+    @staticmethod
+    def write_record(fh, it):
+        pubdate = it.get('pubDate')
+        rec = {
+            'id': it.get('id') or it.get('link'),
+            'link': it.get('link'),
+            'title': it.get('title') or '',
+            'description': it.get('description') or '',
+            'image': it.get('image'),
+            'pub': int(_format_datetime_for_feed(pubdate).timestamp()) if pubdate else None,
+        }
+        fh.write(json.dumps(rec, ensure_ascii=False, sort_keys=True) + '\n')
+
+    def write_all(self, items):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            for it in items:
+                self.write_record(fh, it)
+        return _replace_if_changed(tmp_path, self.path)
+
+    def import_from_feed(self, feed_path):
+        # 第一次使用儲存時，由既有 XML 建立（依 pubDate 由舊到新、以連結去重）
+        items = {}
+        for it in _load_existing_feed_items(feed_path):
+            key = _feed_item_key(it)
+            if key and (key not in items or (it.get('pubDate') and (not items[key].get('pubDate') or it['pubDate'] > items[key]['pubDate']))):
+                items[key] = it
+        now = _now()
+        self.write_all(sorted(items.values(), key=lambda it: _format_datetime_for_feed(it.get('pubDate') or now)))
+        print(f"已由 {feed_path} 建立 feed 項目儲存: {self.path} ({len(items)} 筆)")
+
+
+def _feed_item_key(it):
+    return it.get('link') or it.get('id')
+
+
+def _replace_if_changed(tmp_path, output_path):
+    # 以檔案逐段比較，不必把舊檔整個讀進記憶體
+    import filecmp
+    if os.path.exists(output_path) and filecmp.cmp(tmp_path, output_path, shallow=False):
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, output_path)
+    return True
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# 預先壓縮的 feed：每個 XML 旁另外產生 .xml.gz 與 .xml.br（需安裝 brotli，未安裝時只產生 .gz），
+# 讓鏡像與支援的讀取器直接取得壓縮檔。gzip 標頭不含檔名與時間，相同 XML 的壓縮結果相同，
+# 內容不變時不會取代檔案。
+# 各壓縮方式回傳 (compress, finish) 兩個函式
+def _gzip_compressor():
+    import zlib
+    # wbits=31 輸出 gzip 格式；標頭的 mtime 固定為 0
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def _brotli_compressor():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    compressor = brotli.Compressor(quality=11)
+    return compressor.process, compressor.finish
+
+
+FEED_COMPRESSIONS = (
+    ('.gz', 'gzip', _gzip_compressor),
+    ('.br', 'br', _brotli_compressor),
+)
+
+
+def _compress_file(path, target, compressor):
+    """以串流壓縮寫到暫存檔，內容有變動才取代 target；回傳是否有寫檔"""
+    compress, finish = compressor
+    tmp_path = target + '.tmp'
+    try:
+        with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            for chunk in iter(lambda: src.read(1 << 16), b''):
+                dst.write(compress(chunk))
+            dst.write(finish())
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return _replace_if_changed(tmp_path, target)
+
+
+def _write_compressed_copies(output_path, file_digest, sources=None):
+    """產生 XML 的壓縮檔，回傳各壓縮檔對應的 XML 整檔雜湊（記錄在 meta 的 compressed）
+
+    sources 為上次記錄的對應雜湊；壓縮檔存在且對應的雜湊與目前 XML 相同時才略過。
+    不依檔案時間判斷，git checkout 與 artifact 下載都會改變時間。
+    無法產生的壓縮檔（未安裝 brotli）若已過期則刪除，避免提供舊內容。
+    """
+    sources = sources or {}
+    updated = {}
+    for ext, _, make_compressor in FEED_COMPRESSIONS:
+        target = output_path + ext
+        if sources.get(ext) == file_digest and os.path.exists(target):
+            updated[ext] = file_digest
+            continue
+        compressor = make_compressor()
+        if compressor is None:
+            if os.path.exists(target):
+                print(f"無法更新 {target}，刪除已過期的壓縮檔")
+                os.remove(target)
+            continue
+        _compress_file(output_path, target, compressor)
+        updated[ext] = file_digest
+    return updated
+
+
+def _write_feed_streaming(cat, output_path, store, new_items, max_feed_items=None):
+    """把少量新項目合併進 feed 項目儲存並直接寫出 XML，記憶體只與新項目數量有關
+
+    儲存內項目依 pubDate 由舊到新排列（與 XML 相同；feedgen 的 add_entry 預設為 prepend），
+    讀取兩次：第一次計數、檢查排序並找出與新項目重複的連結，
+    第二次與排序後的新項目合併，同時寫出新的儲存檔與 XML。
+    回傳 None 表示既有項目未依 pubDate 排序，需改用完整合併；否則回傳 XML 是否有寫檔。
+    """
+    now = _now()
+
+    def sort_key(it):
+        return _format_datetime_for_feed(it.get('pubDate') or now)
+
+    new_by_key = {}
+    for it in new_items:
+        key = _feed_item_key(it)
+        if key:
+            new_by_key[key] = it
+
+    existing_count = 0
+    dropped_existing = set()
+    previous = None
+    with METRICS.timer('merge'):
+        for it in store.iter_items():
+            key = _feed_item_key(it)
+            if not key:
+                continue
+            current = sort_key(it)
+            if previous is not None and current < previous:
+                return None
+            previous = current
+            existing_count += 1
+            new_it = new_by_key.get(key)
+            if new_it is not None:
+                # 優先保留較新的 pubDate
+                if new_it.get('pubDate') and (not it.get('pubDate') or new_it['pubDate'] > it['pubDate']):
+                    dropped_existing.add(key)
+                else:
+                    del new_by_key[key]
+
+        new_sorted = sorted(new_by_key.values(), key=sort_key)
+    total = existing_count - len(dropped_existing) + len(new_sorted)
+    skip = 0
+    if max_feed_items and total > max_feed_items:
+        skip = total - max_feed_items
+        print(f"{cat.get('file')} 已超過最大項目數 {max_feed_items}，已移除最舊的 {skip} 筆資料")
+
+    def existing_stream():
+        for it in store.iter_items():
+            key = _feed_item_key(it)
+            if key and key not in dropped_existing:
+                yield it
+
+    merged = heapq.merge(existing_stream(), new_sorted, key=sort_key)
+    return _write_feed_and_store(cat, output_path, store, itertools.islice(merged, skip, None))
+
+
+def _write_feed_and_store(cat, output_path, store, items):
+    """同時寫出 XML 與儲存檔（先寫暫存檔，內容有變動才取代）；回傳 XML 是否有寫檔
+
+    寫出時計算的雜湊（不含產生時間）與 meta 記錄相同、且 XML 檔大小未被改動時，視為沒有變動，
+    不取代任何檔案，lastBuildDate 也維持上次內容變動的時間；沒有 meta 時改為逐段比較檔案。
+    """
+    fmt = _get_feed_format(cat)
+    tmp_path = output_path + '.tmp'
+    store_tmp_path = store.path + '.tmp'
+    os.makedirs(os.path.dirname(store.path) or '.', exist_ok=True)
+    count = 0
+    newest = None
+    try:
+        # 逐項產生並寫入暫存檔，序列化與寫入同時進行，一併計入 serialize
+        with METRICS.timer('serialize'), open(tmp_path, 'wb') as fh, open(store_tmp_path, 'w', encoding='utf-8') as store_fh:
+            writer = FEED_WRITERS[fmt](fh, cat)
+            writer.start()
+            for it in items:
+                writer.write_item(it)
+                store.write_record(store_fh, it)
+                count += 1
+                if it.get('pubDate'):
+                    pubdate = _format_datetime_for_feed(it['pubDate'])
+                    if newest is None or pubdate > newest:
+                        newest = pubdate
+            writer.finish()
+    except BaseException:
+        for path in (tmp_path, store_tmp_path):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    with METRICS.timer('write'):
+        digest = writer.hexdigest()
+        size = os.path.getsize(tmp_path)
+        meta = store.load_meta()
+        if meta.get('sha256') and store.exists() and os.path.exists(output_path):
+            if meta.get('sha256') == digest and meta.get('size') == os.path.getsize(output_path):
+                # XML 內容相同，儲存檔內容也必然相同
+                os.remove(tmp_path)
+                os.remove(store_tmp_path)
+                written = False
+            else:
+                os.replace(store_tmp_path, store.path)
+                os.replace(tmp_path, output_path)
+                written = True
+        else:
+            _replace_if_changed(store_tmp_path, store.path)
+            written = _replace_if_changed(tmp_path, output_path)
+        if written:
+            file_digest = writer.file_hexdigest()
+        else:
+            # 未寫檔時磁碟上的 XML 保留上次的產生時間，整檔雜湊沿用 meta（舊版 meta 沒有時讀檔計算）
+            file_digest = meta.get('file_sha256') or _file_sha256(output_path)
+        compressed = _write_compressed_copies(output_path, file_digest, meta.get('compressed'))
+        new_meta = dict(meta, format=fmt, sha256=digest, size=size, file_sha256=file_digest, items=count,
+                        newest=_format_iso8601(newest) if newest else None, compressed=compressed)
+        if new_meta != meta:
+            store.save_meta(new_meta)
+        return written
+
+
+def render_feed(cat, output_dir):
+    """不重新抓取，直接從 feed 項目儲存重新產生 XML（例如調整輸出格式後）"""
+    store = FeedStore.for_category(cat)
+    output_path = os.path.join(output_dir, cat['file'])
+    if not store.exists():
+        if not os.path.exists(output_path):
+            print(f"{cat['name']} 沒有 feed 項目儲存 ({store.path})，略過")
+            return False
+        store.import_from_feed(output_path)
+    os.makedirs(output_dir, exist_ok=True)
+    written = _write_feed_and_store(cat, output_path, store, store.iter_items())
+    print(f"已從 {store.path} 重新產生: {output_path}" if written else f"{cat['name']} RSS 內容無變動，不寫檔。")
+    return written
+
+
+def _write_feed_full(cat, output_path, store, new_items, max_feed_items=None):
+    """將既有與新項目全部載入記憶體後排序，重新產生 feed；回傳是否有寫檔"""
+    merge_start = time.perf_counter()
+    # 合併既有與新項目，依 pubDate 排序，去重
+    combined = list(store.iter_items()) + new_items
+    # 用 link 作為唯一鍵
+    uniq = {}
+    for it in combined:
+        key = it.get('link') or it.get('id')
+        if not key:
+            continue
+        # 優先保留較新的 pubDate
+        if key in uniq:
+            if it.get('pubDate') and (not uniq[key].get('pubDate') or it['pubDate'] > uniq[key]['pubDate']):
+                uniq[key] = it
+        else:
+            uniq[key] = it
+    items_sorted = sorted(uniq.values(), key=lambda x: x.get('pubDate') or _now(), reverse=True)
+    if max_feed_items and len(items_sorted) > max_feed_items:
+        removed_count = len(items_sorted) - max_feed_items
+        print(f"{cat.get('file')} 已超過最大項目數 {max_feed_items}，已移除最舊的 {removed_count} 筆資料")
+        items_sorted = items_sorted[:max_feed_items]
+    METRICS.observe('merge', time.perf_counter() - merge_start)
+
+    # 項目由新到舊排列；XML 與儲存檔都是由舊到新（與 feedgen 以 prepend 加入項目時相同），反轉後寫出
+    return _write_feed_and_store(cat, output_path, store, reversed(items_sorted))
+
+
+FEED_MERGE_MODES = ('stream', 'full')
+
+
+def _get_feed_merge_mode():
+    # FEED_MERGE=full 可改回完整載入後重新排序的合併方式
+    mode = os.environ.get('FEED_MERGE', 'stream').lower()
+    return mode if mode in FEED_MERGE_MODES else 'stream'
+
+
+DEFAULT_ARTICLE_CONCURRENCY = 4
+
+def _get_article_concurrency_for_category(cat):
+    # 優先使用 categories.json 的 article_concurrency，其次為環境變數 ARTICLE_CONCURRENCY
+    for value in (cat.get('article_concurrency'), os.environ.get('ARTICLE_CONCURRENCY')):
+        if value:
+            try:
+                limit = int(value)
+                if limit > 0:
+                    return limit
+            except (TypeError, ValueError):
+                pass
+    return DEFAULT_ARTICLE_CONCURRENCY
+
+
+class PagePool:
+    """可重複使用的 page 池，限制同一 category 內同時開啟的文章頁數量
+
+    提供 new_context 時，每開啟 recycle_pages 個文章頁，或 memory 取樣到的常駐記憶體超過 max_rss 時，
+    等目前使用中的 page 都歸還後關閉所有 page，改用新的 context（Chromium 才會真正釋放記憶體）。
+    傳入的 context 由呼叫端負責關閉；池自行建立的 context 於 close() 時關閉。
+    """
+
+    def __init__(self, context, size, new_context=None, recycle_pages=0, max_rss=None, memory=None):
+        self._context = context
+        self._owns_context = False
+        self._semaphore = asyncio.Semaphore(size)
+        self._size = size
+        self._idle = []
+        self._pages = []
+        self._new_context = new_context
+        self._recycle_pages = recycle_pages
+        self._max_rss = max_rss
+        self._memory = memory
+        self._uses = 0
+        self._in_use = 0
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._recycle_lock = asyncio.Lock()
+        self.recycled = 0
+
+    def _recycle_due(self):
+        if self._new_context is None or not self._uses:
+            return False
+        if self._recycle_pages and self._uses >= self._recycle_pages:
+            return True
+        # 記憶體可能被其他 category 佔用，至少用過 size 個 page 才再次重建，避免每次都重建
+        current = self._memory.current if self._memory else None
+        return bool(self._max_rss and current and current > self._max_rss and self._uses >= self._size)
+
+    async def _recycle(self):
+        async with self._recycle_lock:
+            if not self._recycle_due():
+                return
+            await self._drained.wait()
+            for page in list(self._pages):
+                await self._discard(page)
+            self._idle = []
+            if self._owns_context:
+                with contextlib.suppress(Exception):
+                    await self._context.close()
+            self._context = await self._new_context()
+            self._owns_context = True
+            self._uses = 0
+            self.recycled += 1
+            METRICS.count('context_recycled')
+
+    @contextlib.asynccontextmanager
+    async def page(self):
+        async with self._semaphore:
+            if self._recycle_due():
+                await self._recycle()
+            page = self._idle.pop() if self._idle else await self._new_page()
+            self._in_use += 1
+            self._drained.clear()
+            reusable = False
+            try:
+                yield page
+                reusable = True
+            finally:
+                self._in_use -= 1
+                self._uses += 1
+                if reusable:
+                    self._idle.append(page)
+                else:
+                    # 導覽失敗的 page 狀態不明，直接關閉，下次需要時再開新的
+                    await self._discard(page)
+                if not self._in_use:
+                    self._drained.set()
+
+    async def _new_page(self):
+        page = await self._context.new_page()
+        self._pages.append(page)
+        return page
+
+    async def _discard(self, page):
+        if page in self._pages:
+            self._pages.remove(page)
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    async def close(self):
+        for page in list(self._pages):
+            await self._discard(page)
+        self._idle = []
+        if self._owns_context:
+            with contextlib.suppress(Exception):
+                await self._context.close()
+
+
+# 記憶體上限模式（MEMORY_BOUNDED=true）：文章頁的 browser context 定期重建，
+# 並回報每個 category 執行期間程序樹（Python、Playwright driver 與 Chromium）常駐記憶體的峰值。
+# 重建條件可在 categories.json 或環境變數個別設定，0 表示停用：
+# - recycle_context_pages / RECYCLE_CONTEXT_PAGES：每開啟 N 個文章頁（預設 50）
+# - recycle_context_rss_mib / RECYCLE_CONTEXT_RSS_MIB：常駐記憶體超過 N MiB（預設 1024）
+DEFAULT_RECYCLE_CONTEXT_PAGES = 50
+DEFAULT_RECYCLE_CONTEXT_RSS_MIB = 1024
+MEMORY_SAMPLE_INTERVAL_SECONDS = 0.5
+
+
+def _memory_bounded():
+    return os.environ.get('MEMORY_BOUNDED', 'false').lower() in ('1', 'true', 'yes')
+
+
+def _process_tree_rss():
+    """目前程序與所有子孫程序的常駐記憶體總和（bytes）；沒有 /proc（非 Linux）時回傳 None"""
+    try:
+        pids = [int(name) for name in os.listdir('/proc') if name.isdigit()]
+    except OSError:
+        return None
+    children = collections.defaultdict(list)
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat', 'rb') as fh:
+                stat = fh.read()
+        except OSError:
+            continue
+        # 程序名稱可能含空白或括號，ppid 是最後一個 ')' 之後的第二個欄位
+        children[int(stat[stat.rindex(b')') + 2:].split()[1])].append(pid)
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    stack = [os.getpid()]
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, ()))
+        try:
+            with open(f'/proc/{pid}/statm', 'rb') as fh:
+                total += int(fh.read().split()[1]) * page_size
+        except OSError:
+            pass
+    return total
+
+
+class MemorySampler:
+    """在背景定期取樣程序樹的常駐記憶體，保留最新值與峰值"""
+
+    def __init__(self, interval=MEMORY_SAMPLE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.current = None
+        self.peak = None
+        self._task = None
+
+    def sample(self):
+        rss = _process_tree_rss()
+        if rss is not None:
+            self.current = rss
+            self.peak = max(self.peak or 0, rss)
+        return rss
+
+    async def _run(self):
+        while True:
+            await asyncio.to_thread(self.sample)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        self.sample()
+
+    def summary(self):
+        if self.peak is None:
+            return '無法取得（需要 /proc）'
+        return f"常駐記憶體峰值 {self.peak / 1024 / 1024:.0f} MiB"
+
+
+# 錄製 fixture：設定 RECORD_FIXTURES=<目錄> 時，保存本次執行實際讀取的列表頁、文章頁內容、
+# 狀態碼、回應標頭與耗時，供 benchmarks/bench_replay.py 離線重播，不必連線到來源網站
+class FixtureRecorder:
+    """將讀取到的頁面寫入 <目錄>/bodies/，執行結束時寫出 manifest.json
+
+    Playwright 的頁面內容以 UTF-8 文字保存；HTTP 回應保存原始位元組，並在 manifest 記錄解碼用的 encoding。
+    """
+
+    RECORDED_HEADERS = ('content-type', 'etag', 'last-modified')
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._navigations = {}
+        self.responses = []
+
+    @classmethod
+    def from_env(cls):
+        root = os.environ.get('RECORD_FIXTURES')
+        return cls(root) if root else None
+
+    def _headers(self, headers):
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        return {k: headers[k] for k in self.RECORDED_HEADERS if k in headers}
+
+    def note_navigation(self, url, response, elapsed):
+        # Playwright 導覽時先記下狀態與耗時，讀取 page.content() 時再一併保存
+        status = response.status if response is not None else None
+        headers = response.headers if response is not None else None
+        with self._lock:
+            self._navigations[url] = (status, self._headers(headers), elapsed)
+
+    def record_page(self, url, html):
+        with self._lock:
+            status, headers, elapsed = self._navigations.pop(url, (200, {}, 0.0))
+        self.record(url, 'browser', html, status, headers, elapsed)
+
+    def record(self, url, via, body, status=200, headers=None, elapsed=0.0, encoding=None):
+        name = hashlib.sha1(f'{via} {url}'.encode('utf-8')).hexdigest() + '.html'
+        os.makedirs(os.path.join(self.root, 'bodies'), exist_ok=True)
+        if isinstance(body, bytes):
+            with open(os.path.join(self.root, 'bodies', name), 'wb') as fh:
+                fh.write(body)
+        else:
+            with open(os.path.join(self.root, 'bodies', name), 'w', encoding='utf-8') as fh:
+                fh.write(body or '')
+            encoding = 'utf-8'
+        entry = {
+            'url': url, 'via': via, 'status': status, 'headers': self._headers(headers),
+            'elapsed': round(elapsed, 4), 'body': f'bodies/{name}',
+        }
+        if encoding:
+            entry['encoding'] = encoding
+        with self._lock:
+            self.responses.append(entry)
+
+    def save(self, categories):
+        manifest = {'recorded_at': _now().isoformat(), 'categories': categories, 'responses': self.responses}
+        path = os.path.join(self.root, 'manifest.json')
+        os.makedirs(self.root, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(manifest, fh, ensure_ascii=False, indent=2)
+            fh.write('\n')
+        print(f"已錄製 {len(self.responses)} 個回應: {path}")
+
+
+FIXTURE_RECORDER = FixtureRecorder.from_env()
+
+
+# 依來源網域（origin）排程所有請求：限制同時請求數與每秒請求數，所有 category 共用；
+# 遇到 429/5xx 或逾時時對該網域指數退避，不同網域之間互不影響
+DEFAULT_DOMAIN_MAX_CONCURRENCY = 4
+DEFAULT_DOMAIN_RPS = 4.0
+DOMAIN_BACKOFF_BASE_SECONDS = 2.0
+DOMAIN_BACKOFF_MAX_SECONDS = 60.0
+_timeout_errors_cache = None
+
+
+def _timeout_errors():
+    # 逾時例外類別來自 requests 與 playwright，第一次需要時才匯入
+    global _timeout_errors_cache
+    if _timeout_errors_cache is None:
+        import requests
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+        _timeout_errors_cache = (asyncio.TimeoutError, requests.Timeout, PlaywrightTimeoutError)
+    return _timeout_errors_cache
+
+
+def _is_throttle_status(status):
+    return status is not None and (status == 429 or status >= 500)
+
+
+class _DomainState:
+    def __init__(self, max_concurrency, rps):
+        self.semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self.interval = 1.0 / rps if rps and rps > 0 else 0.0
+        self.next_start = 0.0
+        self.backoff = 0.0
+        self.requests = 0
+        self.backoffs = 0
+        self.waited = 0.0
+
+
+class _Slot:
+    # 呼叫端在 slot 內填入回應狀態碼，離開時由 scheduler 判斷是否需要退避
+    status = None
+
+
+class DomainScheduler:
+    """以 origin 為單位的請求排程（Playwright 導覽與 HTTP 抓取共用）"""
+
+    def __init__(self, max_concurrency=DEFAULT_DOMAIN_MAX_CONCURRENCY, rps=DEFAULT_DOMAIN_RPS):
+        self._defaults = (max_concurrency, rps)
+        self._overrides = {}
+        self._domains = {}
+
+    @classmethod
+    def from_env(cls):
+        max_concurrency = DEFAULT_DOMAIN_MAX_CONCURRENCY
+        try:
+            max_concurrency = int(os.environ.get('DOMAIN_MAX_CONCURRENCY', max_concurrency))
+        except ValueError:
+            pass
+        return cls(max_concurrency, _get_float_env('DOMAIN_RPS', DEFAULT_DOMAIN_RPS))
+
+    @staticmethod
+    def origin(url):
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+    def configure(self, url, max_concurrency=None, rps=None):
+        # categories.json 的 domain_max_concurrency / domain_rps；同一網域以第一個設定為準
+        origin = self.origin(url)
+        if origin in self._domains or origin in self._overrides:
+            return
+        default_concurrency, default_rps = self._defaults
+        self._overrides[origin] = (
+            max_concurrency if max_concurrency is not None else default_concurrency,
+            rps if rps is not None else default_rps,
+        )
+
+    def _state(self, origin):
+        state = self._domains.get(origin)
+        if state is None:
+            state = _DomainState(*self._overrides.get(origin, self._defaults))
+            self._domains[origin] = state
+        return state
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url):
+        origin = self.origin(url)
+        state = self._state(origin)
+        async with state.semaphore:
+            now = time.monotonic()
+            start = max(now, state.next_start)
+            state.next_start = start + state.interval
+            if start > now:
+                state.waited += start - now
+                await asyncio.sleep(start - now)
+            state.requests += 1
+            slot = _Slot()
+            try:
+                yield slot
+            except _timeout_errors():
+                METRICS.count('timeouts')
+                self._back_off(origin, state, '逾時')
+                raise
+            except Exception as e:
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                if _is_throttle_status(status):
+                    self._back_off(origin, state, status)
+                raise
+            if _is_throttle_status(slot.status):
+                self._back_off(origin, state, slot.status)
+            elif state.backoff:
+                # 成功後逐步恢復原本的速度
+                state.backoff = state.backoff / 2 if state.backoff > DOMAIN_BACKOFF_BASE_SECONDS else 0.0
+
+    def _back_off(self, origin, state, reason):
+        METRICS.count('backoffs')
+        state.backoff = min(max(state.backoff * 2, DOMAIN_BACKOFF_BASE_SECONDS), DOMAIN_BACKOFF_MAX_SECONDS)
+        state.backoffs += 1
+        state.next_start = max(state.next_start, time.monotonic() + state.backoff)
+        print(f"{origin} 回應 {reason}，暫停該網域 {state.backoff:.1f} 秒")
+
+    def summary(self):
+        if not self._domains:
+            return '無'
+        return '; '.join(
+            f"{origin}: {state.requests} 個請求, 退避 {state.backoffs} 次, 累計等待 {state.waited:.1f} 秒"
+            for origin, state in sorted(self._domains.items())
+        )
+
+
+async def _scheduled_goto(page, url, scheduler, **kwargs):
+    """經由 scheduler 導覽，回傳 goto 的 response（可能為 None）"""
+    async with scheduler.slot(url) as slot:
+        start = time.perf_counter()
+        response = await page.goto(url, **kwargs)
+        slot.status = response.status if response is not None else None
+        if FIXTURE_RECORDER:
+            FIXTURE_RECORDER.note_navigation(url, response, time.perf_counter() - start)
+        return response
+
+
+async def _fetch_article_html(pool, href, timeout_ms, scheduler):
+    try:
+        async with pool.page() as art_page:
+            response = await _scheduled_goto(art_page, href, scheduler, wait_until='domcontentloaded', timeout=timeout_ms)
+            if response is not None and _is_throttle_status(response.status):
+                print(f"文章 {href} 回應 {response.status}，跳過此文章")
+                return None
+            html = await art_page.content()
+            if FIXTURE_RECORDER:
+                FIXTURE_RECORDER.record_page(href, html)
+            return html
+    except Exception as e:
+        print(f"導覽文章 {href} 失敗或超時 ({timeout_ms}ms)，跳過此文章: {e}")
+    return None
+
+
+# HTML 解析層：預設使用 lxml（列於 requirements.txt），可用環境變數 HTML_PARSER 改回 html.parser。
+# 文章頁只需要 <head> 的 meta/title、JSON-LD、<time> 與 <img>，列表頁只需要連結，
+# 因此以 SoupStrainer 只建立需要的節點，其餘內容僅掃描不建樹
+HTML_PARSERS = ('lxml', 'html.parser')
+ARTICLE_PARSE_TAGS = ['meta', 'title', 'script', 'time', 'img']
+LIST_PARSE_TAGS = ['a', 'link']
+
+_html_parser = None
+
+def _get_html_parser():
+    global _html_parser
+    if _html_parser is None:
+        parser = os.environ.get('HTML_PARSER', 'lxml')
+        if parser not in HTML_PARSERS:
+            print(f"Warning: 不支援的 HTML_PARSER '{parser}'，改用 html.parser")
+            parser = 'html.parser'
+        if parser == 'lxml':
+            try:
+                import lxml  # noqa: F401
+            except ImportError:
+                print("Warning: 未安裝 lxml，改用 html.parser")
+                parser = 'html.parser'
+        _html_parser = parser
+    return _html_parser
+
+
+def parse_html(html, only_tags=None):
+    """解析 HTML；指定 only_tags 時只建立這些標籤（含其子節點）"""
+    from bs4 import BeautifulSoup, SoupStrainer
+    parse_only = SoupStrainer(only_tags) if only_tags else None
+    return BeautifulSoup(html, _get_html_parser(), parse_only=parse_only)
+
+
+_HEAD_END_RE = re.compile(r'</head\s*>', re.IGNORECASE)
+_BODY_METADATA_RE = re.compile(r'<meta\b|ld\+json', re.IGNORECASE)
+
+
+def _extract_article_details(article_html, href):
+    """從文章頁 HTML 擷取標題、描述、圖片與發佈時間（不含列表頁資訊，可直接快取）"""
+    with METRICS.timer('article_parse'):
+        return _extract_article_details_uninstrumented(article_html, href)
+
+
+def _extract_article_details_uninstrumented(article_html, href):
+    # 快速路徑：<body> 內沒有 meta 或 JSON-LD 時，只解析 <head>；
+    # 若 head 已足以取得標題、發佈時間與圖片（<time>/<img> 只是備援），結果與解析整份文件相同
+    head_end = _HEAD_END_RE.search(article_html)
+    if head_end and not _BODY_METADATA_RE.search(article_html, head_end.end()):
+        details = _extract_and_release(parse_html(article_html[:head_end.start()], ARTICLE_PARSE_TAGS), href)
+        if details['title'] and details['pubDate'] and details['image']:
+            return details
+    return _extract_and_release(parse_html(article_html, ARTICLE_PARSE_TAGS), href)
+
+
+def _extract_and_release(art_soup, href):
+    # 結果只含字串與 datetime，擷取完即拆解解析樹：BeautifulSoup 的節點彼此循環參照，
+    # 不拆解要等到 gc 才會釋放
+    try:
+        return _extract_details_from_soup(art_soup, href)
+    finally:
+        art_soup.decompose()
+
+
+def _extract_details_from_soup(art_soup, href):
+    title = ''
+    desc = ''
+    image = None
+
+    # 嘗試從 og:title 或 title 標籤獲取
+    meta_title = art_soup.find('meta', attrs={'property': 'og:title'})
+    if meta_title and meta_title.get('content'):
+        title = meta_title.get('content').strip()
+    elif art_soup.title and art_soup.title.string:
+        title = art_soup.title.string.strip()
+
+    # description
+    meta = art_soup.find('meta', attrs={'name': 'description'})
+    if not meta:
+        meta = art_soup.find('meta', attrs={'property': 'og:description'})
+    if meta and meta.get('content'):
+        desc = meta.get('content').strip()
+
+    # image
+    meta_img = art_soup.find('meta', attrs={'property': 'og:image'})
+    if not meta_img:
+        meta_img = art_soup.find('meta', attrs={'name': 'twitter:image'})
+    if meta_img and meta_img.get('content'):
+        image = urljoin(href, meta_img.get('content').strip())
+    else:
+        # selector 清單依文件順序回傳第一個符合者，等同第一個 <img>，因此只解析 <img> 也能得到相同結果
+        img_tag = art_soup.select_one('article img, .article img, .post img, img')
+        if img_tag and img_tag.get('src'):
+            image = urljoin(href, img_tag.get('src').strip())
+
+    # pubdate
+    with METRICS.timer('pubdate'):
+        pubdate = _parse_pubdate_from_soup(art_soup, urlparse(href).netloc)
+    return {'title': title, 'description': desc, 'image': image, 'pubDate': pubdate}
+
+
+def _merge_list_title(page_details, title):
+    # 列表頁有標題時優先使用，否則使用文章頁標題；描述與標題相同時視為無描述
+    title = title or page_details['title']
+    desc = page_details['description']
+    if desc == title:
+        desc = ''
+    return {'title': title or '', 'description': desc, 'image': page_details['image'], 'pubDate': page_details['pubDate']}
+
+
+# 文章 metadata 快取：以文章 URL 為鍵，保存已擷取的標題、描述、圖片與發佈時間，
+# 讓已知文章（包含被判定為非今日的文章，以及出現在多個 category 的文章）不必重新抓取
+DEFAULT_ARTICLE_CACHE_MAX_AGE_HOURS = 24
+DEFAULT_ARTICLE_CACHE_EVICT_DAYS = 30
+
+
+def _get_float_env(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class ArticleCache:
+    """以 SQLite 保存文章 metadata，超過 max_age 後以 ETag/Last-Modified 重新驗證"""
+
+    def __init__(self, path, max_age_hours=DEFAULT_ARTICLE_CACHE_MAX_AGE_HOURS, evict_days=DEFAULT_ARTICLE_CACHE_EVICT_DAYS):
+        import sqlite3
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.max_age = max_age_hours * 3600
+        self.evict_age = evict_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS articles ('
+            ' url TEXT PRIMARY KEY, title TEXT, description TEXT, image TEXT,'
+            ' pubdate REAL, etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls, output_dir):
+        # ARTICLE_CACHE 可指定快取路徑，設為 off 則停用
+        path = os.environ.get('ARTICLE_CACHE') or os.path.join(output_dir, '.cache', 'articles.sqlite3')
+        if path.lower() in ('0', 'off', 'false', 'no'):
+            return None
+        try:
+            return cls(
+                path,
+                _get_float_env('ARTICLE_CACHE_MAX_AGE_HOURS', DEFAULT_ARTICLE_CACHE_MAX_AGE_HOURS),
+                _get_float_env('ARTICLE_CACHE_EVICT_DAYS', DEFAULT_ARTICLE_CACHE_EVICT_DAYS),
+            )
+        except Exception as e:
+            print(f"開啟文章快取 {path} 失敗，停用快取: {e}")
+            return None
+
+    def get(self, url):
+        row = self._conn.execute(
+            'SELECT title, description, image, pubdate, etag, last_modified, fetched_at FROM articles WHERE url = ?',
+            (url,),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        title, desc, image, pubdate, etag, last_modified, fetched_at = row
+        fresh = time.time() - fetched_at < self.max_age
+        if fresh:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return {
+            'title': title or '',
+            'description': desc or '',
+            'image': image,
+            'pubDate': datetime.datetime.fromtimestamp(pubdate, datetime.timezone.utc) if pubdate is not None else None,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresh': fresh,
+        }
+
+    def put(self, url, details, etag=None, last_modified=None):
+        pubdate = details.get('pubDate')
+        if pubdate is not None:
+            pubdate = _format_datetime_for_feed(pubdate).timestamp()
+        self._conn.execute(
+            'INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (url, details.get('title'), details.get('description'), details.get('image'), pubdate, etag, last_modified, time.time()),
+        )
+        self._conn.commit()
+
+    def touch(self, url):
+        self._conn.execute('UPDATE articles SET fetched_at = ? WHERE url = ?', (time.time(), url))
+        self._conn.commit()
+
+    def evict(self):
+        cur = self._conn.execute('DELETE FROM articles WHERE fetched_at < ?', (time.time() - self.evict_age,))
+        self._conn.commit()
+        return cur.rowcount
+
+    def close(self):
+        evicted = self.evict()
+        print(f"文章快取: 命中={self.hits}, 未命中/過期={self.misses}, 清除過舊={evicted}")
+        self._conn.close()
+
+
+# 文章頁抓取策略（categories.json 的 article_fetch 欄位）：
+# - auto: 先用 HTTP 抓取，缺少標題或發佈時間時才改用 Playwright
+# - http: 只用 HTTP
+# - browser: 只用 Playwright（原本的行為）
+ARTICLE_FETCH_STRATEGIES = ('auto', 'http', 'browser')
+DEFAULT_ARTICLE_FETCH_STRATEGY = 'auto'
+HTTP_TIMEOUT_SECONDS = 20
+HTTP_POOL_SIZE = 16
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'zh-TW,zh;q=0.9,en;q=0.8',
+}
+
+_http_session = None
+
+def _get_http_session():
+    # 共用同一個 Session，讓同一網站的請求重複使用 keep-alive 連線
+    global _http_session
+    if _http_session is None:
+        import requests # 文章頁優先以 HTTP 抓取，必要時才回退到 Playwright
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update(HTTP_HEADERS)
+        _http_session = session
+    return _http_session
+
+
+HttpResult = collections.namedtuple('HttpResult', 'html etag last_modified not_modified')
+
+
+def _fetch_html_over_http(session, url, etag=None, last_modified=None, timeout_s=HTTP_TIMEOUT_SECONDS):
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    resp = session.get(url, headers=headers, timeout=timeout_s)
+    content_type = resp.headers.get('Content-Type', '').lower()
+    # 未指定 charset 時 requests 會假設 ISO-8859-1，中文頁面需改用偵測結果
+    if 'html' in content_type and 'charset' not in content_type:
+        resp.encoding = resp.apparent_encoding
+    if FIXTURE_RECORDER:
+        # 保存原始位元組與實際解碼用的 charset，重播時的解碼結果與實際執行相同
+        FIXTURE_RECORDER.record(url, 'http', resp.content, resp.status_code, resp.headers, resp.elapsed.total_seconds(),
+                                encoding=resp.encoding)
+    if resp.status_code == 304:
+        return HttpResult(None, etag, last_modified, True)
+    resp.raise_for_status()
+    METRICS.count('bytes_http', len(resp.content))
+    etag = resp.headers.get('ETag')
+    last_modified = resp.headers.get('Last-Modified')
+    if 'html' not in content_type:
+        return HttpResult(None, etag, last_modified, False)
+    return HttpResult(resp.text, etag, last_modified, False)
+
+
+def _get_article_fetch_strategy(cat):
+    strategy = (cat.get('article_fetch') or DEFAULT_ARTICLE_FETCH_STRATEGY).lower()
+    if strategy not in ARTICLE_FETCH_STRATEGIES:
+        print(f"Warning: 未知的 article_fetch '{strategy}'，改用 {DEFAULT_ARTICLE_FETCH_STRATEGY}")
+        return DEFAULT_ARTICLE_FETCH_STRATEGY
+    return strategy
+
+
+async def _fetch_article_details(pool, href, title, strategy, timeout_ms, scheduler, cache=None, registry=None):
+    start = time.perf_counter()
+
+    def fetch():
+        return _fetch_article_details_by_strategy(pool, href, title, strategy, timeout_ms, scheduler, cache)
+
+    if registry is not None:
+        source, page_details = await registry.fetch(href, fetch)
+    else:
+        source, page_details = await fetch()
+    elapsed = time.perf_counter() - start
+    METRICS.observe('article_fetch', elapsed)
+    METRICS.count(f'article_{source}')
+    METRICS.record_article(href, source, elapsed)
+    return _merge_list_title(page_details, title) if page_details else None
+
+
+async def _fetch_article_details_by_strategy(pool, href, title, strategy, timeout_ms, scheduler, cache=None):
+    # 回傳 (來源, 文章頁資訊)；來源為 cache / not_modified / http / browser / failed。
+    # 文章頁資訊不含列表頁標題，可在多個 category 之間共用；title 只用來判斷 HTTP 結果是否足夠
+    cached = cache.get(href) if cache else None
+    if cached and cached['fresh']:
+        return 'cache', cached
+
+    if strategy in ('auto', 'http'):
+        result = None
+        try:
+            async with scheduler.slot(href):
+                result = await asyncio.to_thread(
+                    _fetch_html_over_http, _get_http_session(), href,
+                    cached and cached['etag'], cached and cached['last_modified'],
+                )
+        except Exception as e:
+            print(f"HTTP 抓取文章 {href} 失敗: {e}")
+        if result and result.not_modified and cached:
+            # 304：內容未變，沿用快取
+            cache.touch(href)
+            return 'not_modified', cached
+        if result and result.html:
+            page_details = _extract_article_details(result.html, href)
+            if strategy == 'http' or ((title or page_details['title']) and page_details['pubDate']):
+                if cache:
+                    cache.put(href, page_details, result.etag, result.last_modified)
+                return 'http', page_details
+            print(f"HTTP 回應缺少標題或發佈時間，改用 Playwright: {href}")
+        elif strategy == 'http':
+            return 'failed', None
+        METRICS.count('http_fallback')
+
+    article_html = await _fetch_article_html(pool, href, timeout_ms, scheduler)
+    if article_html:
+        page_details = _extract_article_details(article_html, href)
+        if cache:
+            cache.put(href, page_details)
+        return 'browser', page_details
+    return 'failed', None
+
+
+# 同一次執行中共用文章抓取結果：多個 category 常列出相同文章，
+# 以正規化後的 URL 為鍵，每篇文章最多抓取一次；同時需要同一篇文章的 category 會等待同一個抓取
+TRACKING_QUERY_PARAMS = frozenset([
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid', '_ga', '_gl',
+])
+TRACKING_QUERY_PREFIXES = ('utm_',)
+_DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+
+def normalize_article_url(url):
+    """比對用的 URL：移除追蹤參數、片段與預設連接埠，統一主機大小寫與結尾斜線（不用於輸出）"""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    try:
+        port = parsed.port
+    except ValueError:
+        return url.strip()
+    if port and str(port) != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    query = [
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_QUERY_PARAMS and not k.lower().startswith(TRACKING_QUERY_PREFIXES)
+    ]
+    return urlunparse((scheme, host, parsed.path.rstrip('/') or '/', parsed.params, urlencode(query), ''))
+
+
+class ArticleRegistry:
+    """單次執行內所有 category 共用的文章頁資訊"""
+
+    def __init__(self):
+        self._results = {}
+        self._inflight = {}
+        self.shared = 0
+
+    def _start(self, key, fetch):
+        entry = {'task': asyncio.ensure_future(fetch()), 'waiters': 0}
+        self._inflight[key] = entry
+        entry['task'].add_done_callback(lambda task: self._settle(key, entry, task))
+        return entry
+
+    def _settle(self, key, entry, task):
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is None:
+            source, details = task.result()
+            if details is not None:
+                self._results[key] = details
+
+    async def _join(self, entry):
+        # 以 shield 等待，單一 category 提前停止時不會取消其他 category 也在等待的抓取
+        entry['waiters'] += 1
+        try:
+            return await asyncio.shield(entry['task'])
+        except asyncio.CancelledError:
+            if entry['task'].cancelled():
+                return 'failed', None
+            if entry['waiters'] == 1:
+                entry['task'].cancel()
+            raise
+        except Exception as e:
+            print(f"抓取文章發生錯誤: {e}")
+            return 'failed', None
+        finally:
+            entry['waiters'] -= 1
+
+    async def fetch(self, url, fetch):
+        """fetch() 回傳 (來源, 文章頁資訊)；結果來自其他 category 時來源為 shared"""
+        key = normalize_article_url(url)
+        if key in self._results:
+            self.shared += 1
+            return 'shared', self._results[key]
+        entry = self._inflight.get(key)
+        if entry is not None:
+            source, details = await self._join(entry)
+            if details is not None:
+                self.shared += 1
+                return 'shared', details
+            # 其他 category 的抓取失敗（例如該 category 已結束並關閉 page），改由自己重新抓取
+            entry = self._inflight.get(key)
+        if entry is None:
+            entry = self._start(key, fetch)
+        return await self._join(entry)
+
+# Playwright 導覽時攔截不需要的資源：scraper 只讀取 page.content() 與 meta 標籤，
+# 圖片、字型、樣式表與第三方追蹤腳本都不需要下載，也能讓 networkidle 更快達成
+DEFAULT_BLOCKED_RESOURCE_TYPES = ['image', 'media', 'font', 'stylesheet']
+DEFAULT_BLOCKED_DOMAINS = [
+    'google-analytics.com', 'googletagmanager.com', 'googlesyndication.com',
+    'doubleclick.net', 'googleadservices.com', 'adservice.google.com',
+    'facebook.net', 'facebook.com', 'connect.facebook.net',
+    'scorecardresearch.com', 'hotjar.com', 'clarity.ms', 'criteo.com',
+    'taboola.com', 'outbrain.com', 'chartbeat.com', 'newrelic.com', 'nr-data.net',
+]
+_COUNTRY_SECOND_LEVEL = ('com', 'co', 'org', 'net', 'edu', 'gov', 'ac')
+
+
+def _site_domain(host):
+    # 取得可註冊網域，例如 fc.bnext.com.tw -> bnext.com.tw
+    parts = host.lower().split(':')[0].split('.')
+    if len(parts) >= 3 and len(parts[-1]) == 2 and parts[-2] in _COUNTRY_SECOND_LEVEL:
+        return '.'.join(parts[-3:])
+    return '.'.join(parts[-2:])
+
+
+def _host_matches(host, domains):
+    host = host.lower()
+    return any(host == d or host.endswith('.' + d) for d in domains)
+
+
+class NetworkStats:
+    """統計攔截的請求數量與實際下載量"""
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.blocked = collections.Counter()
+
+    def record_response(self, response):
+        self.requests += 1
+        try:
+            self.bytes += int(response.headers.get('content-length') or 0)
+        except (TypeError, ValueError):
+            pass
+
+    def merge(self, other):
+        self.requests += other.requests
+        self.bytes += other.bytes
+        self.blocked.update(other.blocked)
+
+    def summary(self):
+        blocked_total = sum(self.blocked.values())
+        detail = ', '.join(f"{k}={v}" for k, v in self.blocked.most_common())
+        return f"已攔截 {blocked_total} 個請求 ({detail or '無'})，實際下載 {self.requests} 個請求 / {self.bytes / 1024:.1f} KiB"
+
+
+class RequestBlocker:
+    """依 category 設定中止不需要的請求
+
+    categories.json 可設定：
+    - block_resource_types: 要攔截的資源類型（預設 image/media/font/stylesheet）
+    - block_domains: 額外要攔截的網域
+    - allow_domains: 永不攔截的網域（優先於其他規則）
+    - block_third_party_scripts: 是否攔截非本站的 script（預設 true）
+    設定環境變數 BLOCK_RESOURCES=false 可完全停用。
+    """
+
+    def __init__(self, cat, stats):
+        self.stats = stats
+        self.enabled = os.environ.get('BLOCK_RESOURCES', 'true').lower() not in ('0', 'false', 'no')
+        types = cat.get('block_resource_types')
+        self.resource_types = set(DEFAULT_BLOCKED_RESOURCE_TYPES if types is None else types)
+        self.domains = DEFAULT_BLOCKED_DOMAINS + list(cat.get('block_domains') or [])
+        self.allow_domains = list(cat.get('allow_domains') or [])
+        self.block_third_party_scripts = cat.get('block_third_party_scripts', True)
+        self.site = _site_domain(urlparse(cat['url']).netloc)
+
+    def _block_reason(self, request):
+        host = urlparse(request.url).hostname or ''
+        if not host or _host_matches(host, self.allow_domains):
+            return None
+        if request.resource_type in self.resource_types:
+            return request.resource_type
+        if _host_matches(host, self.domains):
+            return 'domain'
+        if self.block_third_party_scripts and request.resource_type == 'script' and not _host_matches(host, [self.site]):
+            return 'third_party_script'
+        return None
+
+    async def install(self, context):
+        context.on('response', self.stats.record_response)
+        if self.enabled:
+            await context.route('**/*', self._handle)
+
+    async def _handle(self, route):
+        try:
+            reason = self._block_reason(route.request)
+            if reason:
+                self.stats.blocked[reason] += 1
+                await route.abort()
+            else:
+                await route.continue_()
+        except Exception:
+            # page 已關閉時 route 可能失效，忽略即可
+            pass
+
+
+# 列表頁就緒條件（categories.json）：
+# - ready_selector: 等待指定的 CSS selector 出現
+# - ready_min_anchors: 等待頁面上至少有 N 個連結
+# - 兩者皆未設定時，等待連結數量在兩次輪詢間不再變動
+# 條件在 ready_timeout_ms 內未達成時，才退回固定等待
+DEFAULT_READY_TIMEOUT_MS = 10_000
+READY_POLL_INTERVAL_MS = 500
+LIST_FALLBACK_WAIT_MS = 3000
+_ANCHOR_COUNT_JS = 'document.querySelectorAll("a[href]").length'
+
+
+async def _wait_for_anchor_count_stable(page, timeout_ms):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_ms / 1000
+    previous = None
+    while True:
+        count = await page.evaluate(_ANCHOR_COUNT_JS)
+        if count and count == previous:
+            return
+        previous = count
+        if loop.time() >= deadline:
+            raise TimeoutError(f"連結數量在 {timeout_ms}ms 內未穩定")
+        await page.wait_for_timeout(READY_POLL_INTERVAL_MS)
+
+
+async def _wait_for_list_ready(page, cat):
+    timeout_ms = int(cat.get('ready_timeout_ms') or DEFAULT_READY_TIMEOUT_MS)
+    try:
+        if cat.get('ready_selector'):
+            await page.wait_for_selector(cat['ready_selector'], state='attached', timeout=timeout_ms)
+        elif cat.get('ready_min_anchors'):
+            await page.wait_for_function(
+                f'n => {_ANCHOR_COUNT_JS} >= n', arg=int(cat['ready_min_anchors']), timeout=timeout_ms
+            )
+        else:
+            await _wait_for_anchor_count_stable(page, timeout_ms)
+        return True
+    except Exception as e:
+        print(f"等待列表頁就緒失敗，改為固定等待 {LIST_FALLBACK_WAIT_MS}ms: {e}")
+        await page.wait_for_timeout(LIST_FALLBACK_WAIT_MS)
+        return False
+
+
+# 列表頁連結過濾規則：通用文章連結偵測，不依賴特定 URL 格式。
+# categories.json 可用 exclude_patterns / article_keywords / nav_keywords 追加規則，
+# 建立 AnchorClassifier 時與預設規則合併並編譯成正規表示式
+ARTICLE_PATH_KEYWORDS = ['/article/', '/articles/', '/post/', '/p/', '/news/', '/story/']
+# 明確的文章 URL 模式，允許沒有標題文字
+STRONG_ARTICLE_PATH_KEYWORDS = ['/article/', '/post/', '/p/']
+LISTING_PATHS = ['/articles', '/article', '/categories', '/category', '/tags', '/tag']
+PAGINATION_QUERY_KEYS = ['page=', 'p=', 'offset=']
+TAXONOMY_PATH_KEYWORDS = ['/categories/', '/category/', '/tag/', '/tags/']
+AUTHOR_PATH_KEYWORDS = ['/author/', '/authors/']
+# 排除其他系統頁面
+EXCLUDED_PATH_PATTERNS = [
+    '/page/', '/search', '/login', '/register', '/account',
+    '/cart', '/checkout', '/product',
+    '/privacy', '/terms', '/about', '/contact',
+    '/rss', '/feed', '.xml', '.json',
+    '/wp-admin', '/wp-content', '/wp-includes',
+    '/static/', '/assets/', '/images/', '/img/',
+    '.jpg', '.png', '.gif', '.pdf', '.css', '.js',
+    '/solutions', '/solutions/', '/list?'  # 排除 AI 解方雜貨店和工具清單頁面
+]
+NAV_KEYWORDS = ['上一頁', '下一頁', 'next', 'previous', 'prev', '更多', 'more', '首頁', 'home']
+# 日期路徑模式: /2025/12/24/ (年/月/日)
+_DATE_PATH_RE = re.compile(r'/\d{4}/\d{1,2}/\d{1,2}/')
+
+_ANCHOR_REJECT = 0
+_ANCHOR_ACCEPT = 1
+_ANCHOR_NEEDS_TITLE = 2
+
+
+def _substring_regex(patterns):
+    # 將多個子字串合併成單一正規表示式；清單為空時永遠不符合
+    patterns = sorted(set(patterns), key=len, reverse=True)
+    if not patterns:
+        return re.compile(r'(?!)')
+    return re.compile('|'.join(re.escape(p) for p in patterns))
+
+
+class AnchorClassifier:
+    """列表頁連結分類器：規則只編譯一次，之後批次過濾整頁的連結"""
+
+    def __init__(self, base_url, exclude_patterns=(), article_keywords=(), nav_keywords=()):
+        self.base_domain = urlparse(base_url).netloc.replace('www.', '')
+        self._article_re = _substring_regex(ARTICLE_PATH_KEYWORDS + list(article_keywords))
+        self._strong_article_re = _substring_regex(STRONG_ARTICLE_PATH_KEYWORDS + list(article_keywords))
+        self._listing_paths = frozenset(LISTING_PATHS)
+        self._pagination_re = _substring_regex(PAGINATION_QUERY_KEYS)
+        self._taxonomy_re = _substring_regex(TAXONOMY_PATH_KEYWORDS)
+        self._author_re = _substring_regex(AUTHOR_PATH_KEYWORDS)
+        self._excluded_re = _substring_regex(EXCLUDED_PATH_PATTERNS + [p.lower() for p in exclude_patterns])
+        nav = [kw.lower() for kw in NAV_KEYWORDS + list(nav_keywords)]
+        self._nav_exact = frozenset(nav)
+        # 較長的導航字詞也以子字串比對（短字詞如「更多」容易誤判，只做完全比對）
+        self._nav_substring_re = _substring_regex([kw for kw in nav if len(kw) > 3])
+
+    @classmethod
+    def for_category(cls, cat):
+        return cls(
+            cat['url'],
+            cat.get('exclude_patterns') or (),
+            cat.get('article_keywords') or (),
+            cat.get('nav_keywords') or (),
+        )
+
+    def _classify_url(self, full_url, list_key):
+        parsed = urlparse(full_url)
+
+        # 0. 排除帶有錨點的連結（頁面內跳轉，如「繼續閱讀」）
+        if parsed.fragment:
+            return _ANCHOR_REJECT
+        # 1. 必須是同域名或子域名
+        if not parsed.netloc.endswith(self.base_domain):
+            return _ANCHOR_REJECT
+        # 排除清單頁本身
+        if full_url.rstrip('/') == list_key:
+            return _ANCHOR_REJECT
+
+        # 2. 排除常見的非文章連結
+        path = parsed.path
+        path_lower = path.lower()
+        segment_count = len([p for p in path.split('/') if p])
+        if not self._article_re.search(path_lower):
+            # 排除清單頁與分頁
+            if path_lower in self._listing_paths and segment_count <= 1:
+                return _ANCHOR_REJECT
+            if parsed.query and self._pagination_re.search(parsed.query.lower()):
+                return _ANCHOR_REJECT
+            # 排除分類/標籤頁：/categories/ai 只有2段 -> 排除；/categories/ai/article/123 -> 保留
+            if segment_count <= 2 and self._taxonomy_re.search(path_lower):
+                return _ANCHOR_REJECT
+            # 排除作者頁
+            if self._author_re.search(path_lower):
+                return _ANCHOR_REJECT
+        if self._excluded_re.search(path_lower):
+            return _ANCHOR_REJECT
+
+        # 3. 排除首頁和分類頁（路徑太短）
+        if segment_count < 1:
+            return _ANCHOR_REJECT
+
+        # 4. 明顯的文章 URL 允許沒有標題，其餘需檢查標題文字
+        if self._strong_article_re.search(path_lower) or _DATE_PATH_RE.search(path):
+            return _ANCHOR_ACCEPT
+        return _ANCHOR_NEEDS_TITLE
+
+    def _is_article_title(self, title):
+        # 非文章 URL，必須有標題文字，且不能是導航類文字
+        if not title or len(title) < 5:
+            return False
+        title_lower = title.lower()
+        return title_lower not in self._nav_exact and not self._nav_substring_re.search(title_lower)
+
+    def filter(self, anchors, list_url):
+        """回傳可能是文章的連結；同一頁重複的 href 只判斷一次 URL 規則"""
+        list_key = list_url.rstrip('/')
+        verdicts = {}
+        kept = []
+        for a in anchors:
+            href = a.get('href', '').strip()
+            if not href:
+                continue
+            verdict = verdicts.get(href)
+            if verdict is None:
+                verdict = verdicts[href] = self._classify_url(urljoin(list_url, href), list_key)
+            if verdict == _ANCHOR_REJECT:
+                continue
+            if verdict == _ANCHOR_NEEDS_TITLE and not self._is_article_title(a.get_text(strip=True)):
+                continue
+            kept.append(a)
+        return kept
+
+
+def _filter_article_anchors(soup, list_url, classifier=None):
+    classifier = classifier or AnchorClassifier(list_url)
+    return classifier.filter(soup.find_all('a', href=True), list_url)
+
+
+# 列表頁導覽策略：依網域記住哪一種等待模式成功與耗時，之後直接從上次成功的模式開始，
+# 逾時依觀察到的耗時百分位數設定；每隔幾次導覽才重新嘗試較嚴格的模式。
+# 狀態保存在 docs/.cache/navigation.json（與文章快取相同，不 commit，由 workflow 快取）
+NAVIGATION_MODES = ('networkidle', 'load', 'domcontentloaded')
+DEFAULT_NAVIGATION_TIMEOUT_MS = 60_000
+MIN_NAVIGATION_TIMEOUT_MS = 10_000
+NAVIGATION_PROBE_TIMEOUT_MS = 15_000
+NAVIGATION_TIMEOUT_FACTOR = 2.0
+NAVIGATION_MIN_SAMPLES = 3
+NAVIGATION_MAX_SAMPLES = 20
+DEFAULT_NAVIGATION_REPROBE_EVERY = 10
+LOAD_IDLE_WAIT_MS = 5000
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class NavigationStrategy:
+    """記錄每個網域各等待模式的成功耗時與失敗次數，並據此排定導覽順序與逾時"""
+
+    def __init__(self, path=None, reprobe_every=DEFAULT_NAVIGATION_REPROBE_EVERY):
+        self.path = path
+        self.reprobe_every = reprobe_every
+        self._state = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as fh:
+                    self._state = json.load(fh)
+            except Exception as e:
+                print(f"讀取導覽策略 {path} 失敗，重新學習: {e}")
+
+    @classmethod
+    def from_env(cls, output_dir):
+        # NAVIGATION_STATE 可指定保存路徑，設為 off 則每次都從 networkidle 開始（原本的行為）
+        path = os.environ.get('NAVIGATION_STATE') or os.path.join(output_dir, '.cache', 'navigation.json')
+        if path.lower() in ('0', 'off', 'false', 'no'):
+            return None
+        reprobe_every = DEFAULT_NAVIGATION_REPROBE_EVERY
+        try:
+            reprobe_every = int(os.environ.get('NAVIGATION_REPROBE_EVERY', reprobe_every))
+        except ValueError:
+            pass
+        return cls(path, reprobe_every)
+
+    def _entry(self, url):
+        return self._state.setdefault(DomainScheduler.origin(url), {'preferred': None, 'since_probe': 0, 'modes': {}})
+
+    def _timeout_for(self, entry, mode):
+        samples = entry['modes'].get(mode, {}).get('latencies_ms') or []
+        if len(samples) < NAVIGATION_MIN_SAMPLES:
+            return DEFAULT_NAVIGATION_TIMEOUT_MS
+        timeout = _percentile(samples, 0.95) * NAVIGATION_TIMEOUT_FACTOR
+        return int(min(DEFAULT_NAVIGATION_TIMEOUT_MS, max(MIN_NAVIGATION_TIMEOUT_MS, timeout)))
+
+    def plan(self, url):
+        """回傳依序嘗試的 (等待模式, 逾時 ms)"""
+        entry = self._entry(url)
+        preferred = entry.get('preferred')
+        if preferred not in NAVIGATION_MODES:
+            return [(mode, DEFAULT_NAVIGATION_TIMEOUT_MS) for mode in NAVIGATION_MODES]
+        start = NAVIGATION_MODES.index(preferred)
+        probing = False
+        entry['since_probe'] = entry.get('since_probe', 0) + 1
+        if start > 0 and entry['since_probe'] >= self.reprobe_every:
+            # 偶爾重新嘗試較嚴格的模式（以較短逾時），網站改善後可以回到 networkidle
+            entry['since_probe'] = 0
+            start, probing = 0, True
+        plan = []
+        for mode in NAVIGATION_MODES[start:]:
+            timeout = self._timeout_for(entry, mode)
+            if probing and NAVIGATION_MODES.index(mode) < NAVIGATION_MODES.index(preferred):
+                timeout = min(timeout, NAVIGATION_PROBE_TIMEOUT_MS)
+            plan.append((mode, timeout))
+        return plan
+
+    def record(self, url, mode, elapsed_ms=None):
+        """elapsed_ms 為 None 表示失敗"""
+        entry = self._entry(url)
+        stats = entry['modes'].setdefault(mode, {'latencies_ms': [], 'failures': 0})
+        if elapsed_ms is None:
+            stats['failures'] += 1
+            return
+        stats['latencies_ms'] = (stats['latencies_ms'] + [round(elapsed_ms)])[-NAVIGATION_MAX_SAMPLES:]
+        entry['preferred'] = mode
+
+    def summary(self):
+        parts = []
+        for origin, entry in sorted(self._state.items()):
+            mode = entry.get('preferred')
+            if mode:
+                samples = entry['modes'].get(mode, {}).get('latencies_ms') or [0]
+                parts.append(f"{origin}: {mode} (p95 {_percentile(samples, 0.95) / 1000:.1f}s)")
+        return '; '.join(parts) or '無'
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(self._state, fh, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"保存導覽策略 {self.path} 失敗: {e}")
+
+
+async def _goto_list_page(page, url, cat, scheduler, navigation=None):
+    with METRICS.timer('list_goto'):
+        loaded = await _goto_with_fallbacks(page, url, scheduler, navigation)
+    if not loaded:
+        return False
+
+    # 等待動態內容穩定（SPA 或延遲載入的區塊），列表就緒後立即繼續
+    with METRICS.timer('ready_wait'):
+        await _wait_for_list_ready(page, cat)
+    return True
+
+
+async def _goto_with_fallbacks(page, url, scheduler, navigation=None):
+    # 依序嘗試 networkidle → load（再等 networkidle 5 秒）→ domcontentloaded；
+    # 有導覽策略時從該網域上次成功的模式開始，逾時依過去的耗時調整
+    if navigation:
+        plan = navigation.plan(url)
+    else:
+        plan = [(mode, DEFAULT_NAVIGATION_TIMEOUT_MS) for mode in NAVIGATION_MODES]
+    if plan[0][0] != NAVIGATION_MODES[0]:
+        print(f"依過去紀錄，直接使用 {plan[0][0]} 導覽（逾時 {plan[0][1]}ms）")
+    for i, (mode, timeout_ms) in enumerate(plan):
+        start = time.perf_counter()
+        try:
+            await _scheduled_goto(page, url, scheduler, wait_until=mode, timeout=timeout_ms)
+            if mode == 'load':
+                await page.wait_for_load_state('networkidle', timeout=LOAD_IDLE_WAIT_MS)
+        except Exception as e:
+            if navigation:
+                navigation.record(url, mode)
+            if i + 1 < len(plan):
+                print(f"使用 {mode} 失敗 ({timeout_ms}ms): {e}")
+                print(f"改用 {plan[i + 1][0]} 重新載入...")
+                METRICS.count(f'goto_fallback_{plan[i + 1][0]}')
+                continue
+            print(f"導覽 {url} 完全失敗 ({timeout_ms}ms): {e}")
+            METRICS.count('list_goto_failed')
+            return False
+        if navigation:
+            navigation.record(url, mode, (time.perf_counter() - start) * 1000)
+        return True
+    return False
+
+
+_NEXT_PAGE_TEXTS = ('下一頁', '下頁', 'next', 'next page', '›', '»')
+
+
+def _find_next_page_url(soup, page_url, cat):
+    # 依序嘗試 categories.json 的 next_page_selector、<link rel="next">、<a rel="next"> 與常見「下一頁」文字
+    candidates = []
+    if cat.get('next_page_selector'):
+        candidates.append(soup.select_one(cat['next_page_selector']))
+    candidates.append(soup.find('link', rel='next'))
+    candidates.append(soup.find('a', rel='next'))
+    for a in soup.find_all('a', href=True):
+        if a.get_text(strip=True).lower() in _NEXT_PAGE_TEXTS:
+            candidates.append(a)
+            break
+    for el in candidates:
+        if el is not None and el.get('href'):
+            next_url = urljoin(page_url, el.get('href').strip())
+            if next_url.rstrip('/') != page_url.rstrip('/'):
+                return next_url
+    return None
+
+
+class OrderedPrefetcher:
+    """依原始順序逐一回傳抓取結果，同時最多預先啟動 window 個抓取
+
+    提前停止（break）後呼叫 close() 取消尚未完成的抓取，浪費的請求最多 window 個。
+    """
+
+    def __init__(self, fetch, items, window):
+        self._fetch = fetch
+        self._items = iter(items)
+        self._window = max(1, window)
+        self._pending = collections.deque()
+
+    def _fill(self):
+        while len(self._pending) < self._window:
+            try:
+                item = next(self._items)
+            except StopIteration:
+                return
+            self._pending.append((item, asyncio.ensure_future(self._fetch(item))))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        self._fill()
+        if not self._pending:
+            raise StopAsyncIteration
+        item, future = self._pending.popleft()
+        result = await future
+        self._fill()
+        return item, result
+
+    async def close(self):
+        futures = [future for _, future in self._pending]
+        self._pending.clear()
+        for future in futures:
+            future.cancel()
+        await asyncio.gather(*futures, return_exceptions=True)
+
+
+# 台灣自 1980 年起不實施夏令時間，固定 UTC+8 即可，不必為此匯入 pytz
+TAIPEI_TZ = datetime.timezone(datetime.timedelta(hours=8), 'Asia/Taipei')
+
+
+def _get_int_setting(cat, key, env_name, default):
+    # 優先使用 categories.json 的設定，其次為環境變數
+    for value in (cat.get(key), os.environ.get(env_name)):
+        if value is not None and value != '':
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                pass
+    return default
+
+
+def _list_fingerprint(urls):
+    """列表頁文章連結（依列表順序、正規化後）的雜湊"""
+    digest = hashlib.sha256()
+    for url in urls:
+        digest.update(normalize_article_url(url).encode('utf-8') + b'\n')
+    return digest.hexdigest()
+
+
+async def fetch_category_with_playwright(cat, browser, run_stats=None, article_cache=None, scheduler=None, navigation=None,
+                                         registry=None, force=False):
+    # browser 由 run_categories() 共用，整個執行只啟動一次 Chromium；scheduler 也由所有 category 共用。
+    # 回傳新增的條目數（daemon 模式依此調整輪詢間隔）
     print(f"正在使用 Playwright 抓取: {cat['name']}...")
+    _current_category.set(cat['file'])
+    category_start = time.perf_counter()
+    if scheduler is None:
+        scheduler = DomainScheduler.from_env()
+        scheduler.configure(cat['url'], cat.get('domain_max_concurrency'), cat.get('domain_rps'))
 
     # 取得今日日期（台灣時區）
-    import pytz
-    tw_tz = pytz.timezone('Asia/Taipei')
-    today_tw = datetime.datetime.now(tw_tz).date()
+    today_tw = _now().astimezone(TAIPEI_TZ).date()
 
     # 檢查是否為初始化模式（抓取前N篇）
     # 如果 XML 檔案不存在，自動啟用初始化模式
     output_dir = os.environ.get('OUTPUT_DIR', 'docs')
     output_path = os.path.join(output_dir, cat['file'])
-    auto_initial = not os.path.exists(output_path)
+    store = FeedStore.for_category(cat)
+    if not store.exists() and os.path.exists(output_path):
+        store.import_from_feed(output_path)
+    auto_initial = not store.exists()
 
     initial_fetch = auto_initial or os.environ.get('INITIAL_FETCH', 'false').lower() in ('1', 'true', 'yes')
     max_items = int(os.environ.get('MAX_ITEMS', '20')) if initial_fetch else None
@@ -256,331 +2412,634 @@ def fetch_category_with_playwright(cat):
     else:
         print(f"只抓取今日發佈的文章: {today_tw}")
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True) # 在 Actions 中通常為 True
-        page = browser.new_page()
+    # 每個 category 使用獨立的 browser context，統一設定請求攔截；有保存的 storage state 時一併載入
+    state_path = _browser_state_path(cat)
+    network_stats = NetworkStats()
 
+    async def _new_context():
+        if state_path and os.path.exists(state_path):
+            ctx = await browser.new_context(storage_state=state_path)
+        else:
+            ctx = await browser.new_context()
+        await RequestBlocker(cat, network_stats).install(ctx)
+        return ctx
+
+    memory_bounded = _memory_bounded()
+    recycle_pages = _get_int_setting(cat, 'recycle_context_pages', 'RECYCLE_CONTEXT_PAGES',
+                                     DEFAULT_RECYCLE_CONTEXT_PAGES if memory_bounded else 0)
+    recycle_rss_mib = _get_int_setting(cat, 'recycle_context_rss_mib', 'RECYCLE_CONTEXT_RSS_MIB',
+                                       DEFAULT_RECYCLE_CONTEXT_RSS_MIB if memory_bounded else 0)
+    memory = MemorySampler() if memory_bounded or recycle_rss_mib > 0 else None
+
+    with METRICS.timer('context'):
+        context = await _new_context()
+        page = await context.new_page()
+    if memory:
+        memory.start()
+    skipped_existing = skipped_old = added = 0
+    written = unchanged = False
+    try:
+        if not await _goto_list_page(page, cat['url'], cat, scheduler, navigation):
+            print(f"已跳過此 category: {cat['url']}")
+            return 0
+
+        # 載入既有 feed 項目（若有），以便只加入新的條目
+        os.makedirs(output_dir, exist_ok=True)
+        # 以正規化 URL 比對，追蹤參數或結尾斜線不同的同一篇文章不會重複加入
+        existing_ids = {normalize_article_url(i) for i in store.ids()}
+
+        new_items = []
+        seen = set()
+        added = 0
+        skipped_old = 0
+        skipped_existing = 0
+
+        # 列表頁指紋：第一頁過濾後的文章連結與上次完整處理時相同，代表沒有新文章，直接略過此 category。
+        # 初始化模式、有文章處理失敗或因 MAX_ITEMS 提前停止時不記錄，下次仍會完整處理
+        list_fingerprint = None
+        complete = True
+
+        # 增量掃描：列表頁由新到舊排列，連續遇到 K 篇已存在或非今日的文章即停止（0 表示停用）
+        # 分頁：整頁都是新文章時才前往下一頁，最多 max_list_pages 頁
+        stop_after = _get_int_setting(cat, 'incremental_stop_after', 'INCREMENTAL_STOP_AFTER', 0)
+        follow_pagination = str(cat.get('follow_pagination', os.environ.get('FOLLOW_PAGINATION', 'false'))).lower() in ('1', 'true', 'yes')
+        max_list_pages = _get_int_setting(cat, 'max_list_pages', 'MAX_LIST_PAGES', 3) if follow_pagination else 1
+
+        # 抓取文章頁面以取得標題、描述和發佈日期
+        # 對於 /article/ 等明確的文章 URL，即使列表頁沒有標題也要進入文章頁抓取
+        # 文章頁同時抓取，但仍依列表頁順序處理結果，讓 MAX_ITEMS 提前停止維持原本行為
+        art_timeout_ms = 60_000
+        strategy = _get_article_fetch_strategy(cat)
+        concurrency = _get_article_concurrency_for_category(cat)
+        pool = PagePool(
+            context, concurrency,
+            new_context=_new_context if recycle_pages > 0 or recycle_rss_mib > 0 else None,
+            recycle_pages=max(recycle_pages, 0), max_rss=max(recycle_rss_mib, 0) * 1024 * 1024, memory=memory,
+        )
+
+        async def _fetch_entry(entry):
+            href, title, known = entry
+            if known:
+                return None
+            return await _fetch_article_details(pool, href, title, strategy, art_timeout_ms, scheduler, article_cache, registry)
+
+        classifier = AnchorClassifier.for_category(cat)
+        page_url = cat['url']
+        visited_pages = {page_url.rstrip('/')}
         try:
-            timeout_ms = 60_000
-            # 嘗試使用 networkidle，如果失敗則降級為 domcontentloaded
-            try:
-                page.goto(cat['url'], wait_until='networkidle', timeout=timeout_ms)
-            except Exception as e:
-                print(f"使用 networkidle 失敗: {e}")
-                print(f"嘗試使用 load 重新載入...")
-                try:
-                    page.goto(cat['url'], wait_until='load', timeout=timeout_ms)
-                    page.wait_for_load_state('networkidle', timeout=5000)
-                except Exception:
-                    print(f"load 重新載入失敗，改用 domcontentloaded...")
+            for page_number in range(1, max_list_pages + 1):
+                html_content = await page.content()
+                if FIXTURE_RECORDER:
+                    FIXTURE_RECORDER.record_page(page_url, html_content)
+                with METRICS.timer('list_parse'):
+                    # 自訂 next_page_selector 可能依賴完整 DOM 結構，此時才解析整份文件
+                    soup = parse_html(html_content, None if cat.get('next_page_selector') else LIST_PARSE_TAGS)
+                    anchors = _filter_article_anchors(soup, page_url, classifier)
+                    next_url = _find_next_page_url(soup, page_url, cat) if page_number < max_list_pages else None
+                print(f"通用過濾後找到 {len(anchors)} 個可能的文章連結" + (f"（第 {page_number} 頁）" if page_number > 1 else ''))
+
+                # 在初始化模式下，限制處理的連結數量以避免過長執行時間
+                # 每個來源最多抓取前 20 篇文章（列表頁顯示的數量）
+                max_links_to_process = 20 if initial_fetch else len(anchors)
+                anchors_to_process = anchors[:max_links_to_process] if initial_fetch else anchors
+
+                if page_number == 1 and not initial_fetch:
+                    list_fingerprint = _list_fingerprint(urljoin(page_url, a.get('href')) for a in anchors_to_process if a.get('href'))
+                    if not force and store.list_unchanged(output_path, list_fingerprint):
+                        print(f"{cat['name']} 列表頁與上次相同，略過（--force 可強制處理）")
+                        METRICS.count('list_unchanged')
+                        unchanged = True
+                        return 0
+
+                entries = []
+                for a in anchors_to_process:
                     try:
-                        page.goto(cat['url'], wait_until='domcontentloaded', timeout=timeout_ms)
-                        # 等待額外 3 秒讓動態內容載入
-                        page.wait_for_timeout(3000)
-                    except Exception as e2:
-                        print(f"導覽 {cat['url']} 完全失敗 ({timeout_ms}ms)，已跳過此 category: {e2}")
-                        return
-
-            # 等待額外時間讓動態內容穩定，尤其是 SPA 或延遲載入的區塊
-            page.wait_for_timeout(3000)
-
-            html_content = page.content()
-            soup = BeautifulSoup(html_content, 'html.parser')
-
-            # 通用文章連結偵測：不依賴特定 URL 格式
-            # 策略：選取所有連結，用啟發式規則過濾
-            from urllib.parse import urlparse
-
-            base_domain = urlparse(cat['url']).netloc
-            all_anchors = soup.find_all('a', href=True)
-
-            filtered_anchors = []
-            for a in all_anchors:
-                href = a.get('href', '').strip()
-                if not href:
-                    continue
-
-                # 取得完整 URL
-                full_url = urljoin(cat['url'], href)
-                parsed = urlparse(full_url)
-
-                # 過濾規則：
-                # 0. 排除帶有錨點的連結（頁面內跳轉，如「繼續閱讀」）
-                if parsed.fragment:
-                    continue
-
-                # 1. 必須是同域名或子域名
-                if not parsed.netloc.endswith(base_domain.replace('www.', '')):
-                    continue
-
-                # 2. 排除常見的非文章連結
-                path_lower = parsed.path.lower()
-                path_stripped = parsed.path.rstrip('/')
-
-                # 檢查是否為文章 URL 的明顯特徵
-                has_article_keyword = any(kw in path_lower for kw in ['/article/', '/articles/', '/post/', '/p/', '/news/', '/story/'])
-
-                # 排除清單頁與分頁
-                if full_url.rstrip('/') == cat['url'].rstrip('/'):
-                    continue
-                if not has_article_keyword:
-                    path_segments = [p for p in parsed.path.split('/') if p]
-                    if parsed.path.lower() in ['/articles', '/article', '/categories', '/category', '/tags', '/tag'] and len(path_segments) <= 1:
-                        continue
-                    if parsed.query and any(q in parsed.query.lower() for q in ['page=', 'p=', 'offset=']):
-                        continue
-
-                    # 排除分類/標籤頁（包含但路徑段數少於3的）
-                    if any(kw in path_lower for kw in ['/categories/', '/category/', '/tag/', '/tags/']):
-                        # /categories/ai 只有2段 -> 排除
-                        # /categories/ai/article/123 有4段 -> 保留（但這種情況少見）
-                        if len(path_segments) <= 2:
+                        href = a.get('href')
+                        title = a.get_text(strip=True)
+                        if not href:
                             continue
 
-                    # 排除作者頁
-                    if any(kw in path_lower for kw in ['/author/', '/authors/']):
-                        continue
-
-                # 排除其他系統頁面
-                excluded_patterns = [
-                    '/page/', '/search', '/login', '/register', '/account',
-                    '/cart', '/checkout', '/product',
-                    '/privacy', '/terms', '/about', '/contact',
-                    '/rss', '/feed', '.xml', '.json',
-                    '/wp-admin', '/wp-content', '/wp-includes',
-                    '/static/', '/assets/', '/images/', '/img/',
-                    '.jpg', '.png', '.gif', '.pdf', '.css', '.js',
-                    '/solutions', '/solutions/', '/list?'  # 排除 AI 解方雜貨店和工具清單頁面
-                ]
-                if any(pattern in path_lower for pattern in excluded_patterns):
-                    continue
-
-                # 3. 排除首頁和分類頁（路徑太短）
-                path_parts = [p for p in parsed.path.split('/') if p]
-                if len(path_parts) < 1:
-                    continue
-
-                # 4. 檢查標題文字
-                title = a.get_text(strip=True)
-
-                # 特殊處理：如果 URL 包含明顯的文章模式，允許沒有標題
-                # /article/, /post/, /p/ 關鍵字
-                has_article_pattern = any(pattern in path_lower for pattern in ['/article/', '/post/', '/p/'])
-
-                # 或日期路徑模式: /2025/12/24/ (年/月/日)
-                import re
-                has_date_pattern = bool(re.search(r'/\d{4}/\d{1,2}/\d{1,2}/', parsed.path))
-
-                if not has_article_pattern and not has_date_pattern:
-                    # 非文章 URL，必須有標題文字
-                    if not title or len(title) < 5:
-                        continue
-
-                    # 排除導航類文字
-                    nav_keywords = ['上一頁', '下一頁', 'next', 'previous', 'prev', '更多', 'more', '首頁', 'home']
-                    if title.lower() in nav_keywords or any(kw in title.lower() for kw in nav_keywords if len(kw) > 3):
-                        continue
-
-                filtered_anchors.append(a)
-
-            anchors = filtered_anchors
-            print(f"通用過濾後找到 {len(anchors)} 個可能的文章連結")
-
-            # 載入既有 feed 項目（若有），以便只加入新的條目
-            os.makedirs(output_dir, exist_ok=True)
-            existing = _load_existing_feed_items(output_path)
-            existing_ids = set([e['id'] for e in existing if e.get('id')])
-
-            new_items = []
-            seen = set()
-            added = 0
-            skipped_old = 0
-            skipped_existing = 0
-
-            # 在初始化模式下，限制處理的連結數量以避免過長執行時間
-            # 每個來源最多抓取前 20 篇文章（列表頁顯示的數量）
-            max_links_to_process = 20 if initial_fetch else len(anchors)
-            anchors_to_process = anchors[:max_links_to_process] if initial_fetch else anchors
-
-            for a in anchors_to_process:
-                try:
-                    href = a.get('href')
-                    title = a.get_text(strip=True)
-                    if not href:
-                        continue
-
-                    href = urljoin(cat['url'], href)
-                    if href in seen:
-                        continue
-                    seen.add(href)
-                    if href in existing_ids:
-                        # 已存在，不再加入
-                        skipped_existing += 1
-                        continue
-
-                    # 抓取文章頁面以取得標題、描述和發佈日期
-                    # 對於 /article/ 等明確的文章 URL，即使列表頁沒有標題也要進入文章頁抓取
-                    desc = ''
-                    image = None
-                    pubdate = None
-                    article_html = None
-                    art_timeout_ms = 60_000
-                    art_page = None
-                    try:
-                        art_page = browser.new_page()
-                        art_page.goto(href, wait_until='domcontentloaded', timeout=art_timeout_ms)
-                        article_html = art_page.content()
+                        href = urljoin(page_url, href)
+                        key = normalize_article_url(href)
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        entries.append((href, title, key in existing_ids))
                     except Exception as e:
-                        print(f"導覽文章 {href} 失敗或超時 ({art_timeout_ms}ms)，跳過此文章: {e}")
-                    finally:
-                        if art_page:
-                            try:
-                                art_page.close()
-                            except Exception:
-                                pass
-
-                    if article_html:
-                        art_soup = BeautifulSoup(article_html, 'html.parser')
-
-                        # 從文章頁獲取標題（如果列表頁沒有標題）
-                        if not title:
-                            # 嘗試從 og:title 或 title 標籤獲取
-                            meta_title = art_soup.find('meta', attrs={'property': 'og:title'})
-                            if meta_title and meta_title.get('content'):
-                                title = meta_title.get('content').strip()
-                            elif art_soup.title and art_soup.title.string:
-                                title = art_soup.title.string.strip()
-
-                            # 如果還是沒有標題，跳過這篇文章
-                            if not title:
-                                print(f"跳過無標題文章: {href}")
+                        print(f"單則處理出錯: {e}")
+                        complete = False
+                # 之後只需要 entries 中的字串，抓取文章頁前先釋放列表頁的 HTML 與解析樹
+                soup.decompose()
+                del html_content, soup, anchors, anchors_to_process
+
+                consecutive_known = 0
+                page_has_known = False
+                stopped = False
+                prefetcher = OrderedPrefetcher(_fetch_entry, entries, concurrency)
+                try:
+                    async for (href, title, known), details in prefetcher:
+                        try:
+                            if known:
+                                # 已存在，不再加入
+                                skipped_existing += 1
+                                page_has_known = True
+                                consecutive_known += 1
+                                if stop_after and consecutive_known >= stop_after:
+                                    print(f"連續 {consecutive_known} 篇已存在或非今日，停止掃描列表頁")
+                                    stopped = True
+                                    break
                                 continue
-                        # description
-                        meta = art_soup.find('meta', attrs={'name': 'description'})
-                        if not meta:
-                            meta = art_soup.find('meta', attrs={'property': 'og:description'})
-                        if meta and meta.get('content'):
-                            meta_desc = meta.get('content').strip()
-                            if meta_desc and meta_desc != title:
-                                desc = meta_desc
-
-                        # image
-                        meta_img = art_soup.find('meta', attrs={'property': 'og:image'})
-                        if not meta_img:
-                            meta_img = art_soup.find('meta', attrs={'name': 'twitter:image'})
-                        if meta_img and meta_img.get('content'):
-                            image = urljoin(href, meta_img.get('content').strip())
-                        else:
-                            img_tag = art_soup.select_one('article img, .article img, .post img, img')
-                            if img_tag and img_tag.get('src'):
-                                image = urljoin(href, img_tag.get('src').strip())
-
-                        # pubdate
-                        pubdate = _parse_pubdate_from_soup(art_soup)
-
-                    if not pubdate:
-                        pubdate = datetime.datetime.now(datetime.timezone.utc)
-
-                    # 檢查是否為今日發佈（僅在非初始化模式）
-                    if not initial_fetch:
-                        pubdate_tw = pubdate.astimezone(tw_tz).date()
-                        if pubdate_tw != today_tw:
-                            print(f"跳過非今日文章: {title[:40]} (發佈日期: {pubdate_tw})")
-                            skipped_old += 1
-                            continue
-
-                    new_items.append({'id': href, 'link': href, 'title': title, 'description': desc, 'pubDate': pubdate, 'image': image})
-                    added += 1
-                    print(f"新增條目: title='{title[:40]}', href={href}, desc={'有' if desc else '無'}, image={'有' if image else '無'}, pub={pubdate})")
-
-                    # 初始化模式下檢查是否已達到上限
-                    if initial_fetch and added >= max_items:
-                        print(f"已達到最大項目數 {max_items}，停止抓取")
-                        break
-                except Exception as e:
-                    print(f"單則處理出錯: {e}")
 
-            print(f"{cat['name']} 抓取統計: 已存在={skipped_existing}, 非今日={skipped_old}, 新增={added}")
+                            desc = ''
+                            image = None
+                            pubdate = None
+
+                            if details:
+                                title = details['title']
+                                # 如果還是沒有標題，跳過這篇文章
+                                if not title:
+                                    print(f"跳過無標題文章: {href}")
+                                    continue
+                                desc = details['description']
+                                image = details['image']
+                                pubdate = details['pubDate']
+
+                            if not pubdate:
+                                pubdate = _now()
+
+                            # 檢查是否為今日發佈（僅在非初始化模式）
+                            if not initial_fetch:
+                                pubdate_tw = pubdate.astimezone(TAIPEI_TZ).date()
+                                if pubdate_tw != today_tw:
+                                    print(f"跳過非今日文章: {title[:40]} (發佈日期: {pubdate_tw})")
+                                    skipped_old += 1
+                                    page_has_known = True
+                                    consecutive_known += 1
+                                    if stop_after and consecutive_known >= stop_after:
+                                        print(f"連續 {consecutive_known} 篇已存在或非今日，停止掃描列表頁")
+                                        stopped = True
+                                        break
+                                    continue
+
+                            consecutive_known = 0
+                            new_items.append({'id': href, 'link': href, 'title': title, 'description': desc, 'pubDate': pubdate, 'image': image})
+                            added += 1
+                            print(f"新增條目: title='{title[:40]}', href={href}, desc={'有' if desc else '無'}, image={'有' if image else '無'}, pub={pubdate})")
+
+                            # 初始化模式下檢查是否已達到上限
+                            if initial_fetch and added >= max_items:
+                                print(f"已達到最大項目數 {max_items}，停止抓取")
+                                stopped = True
+                                complete = False
+                                break
+                        except Exception as e:
+                            print(f"單則處理出錯: {e}")
+                            complete = False
+                finally:
+                    # 提前停止時取消尚未完成的文章抓取
+                    await prefetcher.close()
+
+                # 只有整頁都是新文章時才需要往下一頁找
+                if stopped or page_has_known or page_number >= max_list_pages:
+                    break
+                if not next_url or next_url.rstrip('/') in visited_pages:
+                    break
+                visited_pages.add(next_url.rstrip('/'))
+                print(f"整頁皆為新文章，繼續前往下一頁: {next_url}")
+                if not await _goto_list_page(page, next_url, cat, scheduler, navigation):
+                    break
+                page_url = next_url
+        finally:
+            await pool.close()
+            if pool.recycled:
+                print(f"{cat['name']} 已重建文章頁 context {pool.recycled} 次")
 
-            if not new_items:
-                print(f"{cat['name']} 沒有今日新的條目，保持既有 RSS 不變。")
-                return
+        print(f"{cat['name']} 抓取統計: 已存在={skipped_existing}, 非今日={skipped_old}, 新增={added}")
 
-            # 合併既有與新項目，依 pubDate 排序，去重
-            combined = existing + new_items
-            # 用 link 作為唯一鍵
-            uniq = {}
-            for it in combined:
-                key = it.get('link') or it.get('id')
-                if not key:
-                    continue
-                # 優先保留較新的 pubDate
-                if key in uniq:
-                    if it.get('pubDate') and (not uniq[key].get('pubDate') or it['pubDate'] > uniq[key]['pubDate']):
-                        uniq[key] = it
-                else:
-                    uniq[key] = it
-            items_sorted = sorted(uniq.values(), key=lambda x: x.get('pubDate') or datetime.datetime.now(datetime.timezone.utc), reverse=True)
+        if not new_items:
+            print(f"{cat['name']} 沒有今日新的條目，保持既有 RSS 不變。")
+        else:
             max_feed_items = _get_max_feed_items_for_category(cat)
-            if max_feed_items and len(items_sorted) > max_feed_items:
-                removed_count = len(items_sorted) - max_feed_items
-                print(f"{cat.get('file')} 已超過最大項目數 {max_feed_items}，已移除最舊的 {removed_count} 筆資料")
-                items_sorted = items_sorted[:max_feed_items]
-
-            fg = FeedGenerator()
-            fg.id(cat['url'])
-            fg.title(cat.get('name') or 'RSS')
-            fg.link(href=cat['url'], rel='alternate')
-            fg.description(cat.get('description') or f"自動抓取的 {cat.get('name')} 頻道")
-            fg.language('zh-TW')
-
-            for it in items_sorted:
-                fe = fg.add_entry()
-                fe.id(it.get('id') or it.get('link'))
-                fe.title(it.get('title') or '')
-                if it.get('link'):
-                    fe.link(href=it.get('link'))
-                if it.get('description'):
-                    fe.description(it.get('description'))
-                if it.get('image'):
-                    try:
-                        fe.enclosure(it.get('image'), 0, 'image/*')
-                    except Exception:
-                        if it.get('description'):
-                            fe.description(f"<img src=\"{it.get('image')}\"/>\n" + it.get('description'))
-                        else:
-                            fe.description(f"<img src=\"{it.get('image')}\"/>")
-                fe.pubDate(_format_datetime_for_feed(it.get('pubDate')))
-
-            # 寫檔前比較內容是否有變動，避免無意義 commit
-            import io
-            tmp = io.BytesIO()
-            fg.rss_file(tmp)
-            new_content = tmp.getvalue()
-
-            prev_content = None
-            if os.path.exists(output_path):
-                with open(output_path, 'rb') as fh:
-                    prev_content = fh.read()
-
-            if prev_content == new_content:
+            if _get_feed_merge_mode() == 'stream':
+                written = _write_feed_streaming(cat, output_path, store, new_items, max_feed_items)
+                if written is None:
+                    print(f"{store.path} 未依 pubDate 排序，改用完整合併")
+                    METRICS.count('merge_fallback_full')
+                    written = _write_feed_full(cat, output_path, store, new_items, max_feed_items)
+            else:
+                written = _write_feed_full(cat, output_path, store, new_items, max_feed_items)
+
+            if not written:
                 print(f"{cat['name']} RSS 內容無變動，不寫檔。")
-                return
+            else:
+                print(f"已生成並更新: {output_path} (新增 {len(new_items)} 條)" )
 
-            with open(output_path, 'wb') as fh:
-                fh.write(new_content)
-            print(f"已生成並更新: {output_path} (新增 {len(new_items)} 條)" )
+        if list_fingerprint and complete:
+            store.save_list_fingerprint(list_fingerprint)
 
-        except Exception as e:
-            print(f"抓取 {cat['url']} 失敗: {e}")
+    except Exception as e:
+        print(f"抓取 {cat['url']} 失敗: {e}")
+    finally:
+        if state_path:
+            try:
+                os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+                await context.storage_state(path=state_path)
+            except Exception as e:
+                print(f"儲存 storage state 失敗 {state_path}: {e}")
+        for closable in (page, context):
+            try:
+                await closable.close()
+            except Exception:
+                pass
+        print(f"{cat['name']} 網路統計: {network_stats.summary()}")
+        if run_stats is not None:
+            run_stats.merge(network_stats)
+        METRICS.count('requests_browser', network_stats.requests)
+        METRICS.count('bytes_browser', network_stats.bytes)
+        METRICS.count('requests_blocked', sum(network_stats.blocked.values()))
+        METRICS.observe('category', time.perf_counter() - category_start)
+        peak_rss_mib = None
+        if memory:
+            await memory.stop()
+            print(f"{cat['name']} 記憶體: {memory.summary()}")
+            if memory.peak is not None:
+                peak_rss_mib = round(memory.peak / 1024 / 1024, 1)
+        METRICS.record_category(
+            name=cat.get('name'), existing=skipped_existing, old=skipped_old, added=added, written=bool(written),
+            unchanged=unchanged, peak_rss_mib=peak_rss_mib,
+        )
+    return added
+
+
+DEFAULT_CATEGORY_CONCURRENCY = 4
+
+def _get_category_concurrency():
+    env_value = os.environ.get('CATEGORY_CONCURRENCY')
+    if env_value:
+        try:
+            limit = int(env_value)
+            if limit > 0:
+                return limit
+        except ValueError:
+            pass
+    return DEFAULT_CATEGORY_CONCURRENCY
+
+
+# 瀏覽器來源：預設每次執行啟動新的 Chromium，每個 category 使用空白的 context。可改為：
+# - BROWSER_STATE_DIR：每個 category 的 storage state（cookie、localStorage）存於此目錄並在下次執行載入，
+#   同意橫幅與 cookie 牆不會每次重新出現
+# - BROWSER_PROFILE_DIR：以持久化的 user data dir 啟動（保留 HTTP 磁碟快取、cookie、service worker），
+#   所有 category 共用這個 context，請求攔截與事件改為套用在各自開啟的 page
+# - BROWSER_CDP_URL / BROWSER_WS_ENDPOINT：連線到常駐的瀏覽器（python scraper.py --serve-browser、
+#   playwright run-server），不必每次啟動；以 CDP 連線時沿用該瀏覽器的預設 context
+DEFAULT_BROWSER_SERVE_PORT = 9222
+
+
+def _browser_state_path(cat):
+    state_dir = os.environ.get('BROWSER_STATE_DIR')
+    if not state_dir or state_dir.lower() in ('off', 'false', '0'):
+        return None
+    return os.path.join(state_dir, os.path.splitext(cat['file'])[0] + '.json')
+
+
+class _ScopedContext:
+    """共用 context 中屬於單一 category 的部分：只關閉自己開的 page，route 與事件也只套用在這些 page"""
+
+    def __init__(self, context):
+        self._context = context
+        self._routes = []
+        self._handlers = []
+        self._pages = []
+
+    async def new_page(self):
+        page = await self._context.new_page()
+        self._pages.append(page)
+        for event, handler in self._handlers:
+            page.on(event, handler)
+        for pattern, handler in self._routes:
+            await page.route(pattern, handler)
+        return page
+
+    def on(self, event, handler):
+        self._handlers.append((event, handler))
+        for page in self._pages:
+            page.on(event, handler)
+
+    async def route(self, pattern, handler):
+        self._routes.append((pattern, handler))
+        for page in self._pages:
+            await page.route(pattern, handler)
+
+    async def storage_state(self, path=None):
+        # cookie 等狀態已保存在共用 context（持久化 profile 或常駐瀏覽器）中，不另外寫出
+        return None
+
+    async def close(self):
+        for page in self._pages:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        self._pages = []
+
+
+class SharedContextBrowser:
+    """提供與 Browser 相同的 new_context() / close()，但所有 category 共用同一個 context"""
+
+    def __init__(self, context, close):
+        self._context = context
+        self._close = close
+
+    async def new_context(self, **kwargs):
+        return _ScopedContext(self._context)
+
+    async def close(self):
+        await self._close()
+
+
+async def _open_browser(p):
+    """依環境變數啟動或連線瀏覽器；回傳的物件結束時呼叫 close()（連線時只中斷連線，不關閉遠端瀏覽器）"""
+    cdp_url = os.environ.get('BROWSER_CDP_URL')
+    ws_endpoint = os.environ.get('BROWSER_WS_ENDPOINT')
+    profile_dir = os.environ.get('BROWSER_PROFILE_DIR')
+    if cdp_url:
+        browser = await p.chromium.connect_over_cdp(cdp_url)
+        print(f"已連線到常駐瀏覽器（CDP）: {cdp_url}")
+        if browser.contexts:
+            return SharedContextBrowser(browser.contexts[0], browser.close)
+        return browser
+    if ws_endpoint:
+        browser = await p.chromium.connect(ws_endpoint)
+        print(f"已連線到常駐瀏覽器: {ws_endpoint}")
+        return browser
+    if profile_dir:
+        context = await p.chromium.launch_persistent_context(profile_dir, headless=True)
+        print(f"使用持久化的瀏覽器 profile: {profile_dir}")
+        return SharedContextBrowser(context, context.close)
+    return await p.chromium.launch(headless=True) # 在 Actions 中通常為 True
+
+
+async def serve_browser(port, profile_dir):
+    """啟動常駐的 Chromium（持久化 profile），讓之後的多次執行以 BROWSER_CDP_URL 連線"""
+    from playwright.async_api import async_playwright
+    async with async_playwright() as p:
+        context = await p.chromium.launch_persistent_context(
+            profile_dir, headless=True, args=[f'--remote-debugging-port={port}'],
+        )
+        print(f"瀏覽器已啟動（profile: {profile_dir}），執行時設定 BROWSER_CDP_URL=http://127.0.0.1:{port}；Ctrl+C 結束")
+        try:
+            await asyncio.Event().wait()
         finally:
-            browser.close()
+            await context.close()
+
+
+async def run_categories(categories, concurrency=None, browser=None, force=False):
+    """只啟動一次 Chromium，並以有上限的並行數同時抓取所有 category
+
+    可傳入已建立的 browser（例如重播 fixture 用的替代實作），此時不啟動 Chromium，結束時也不關閉。
+    force 為 True 時，列表頁與上次相同的 category 也完整處理。
+    """
+    if not categories:
+        print("沒有需要抓取的 category")
+        return
+    PUBDATE_PARSER.reset_counts()
+    if browser is not None:
+        await _run_categories_with_browser(categories, browser, concurrency, force)
+        return
+
+    from playwright.async_api import async_playwright
+    async with async_playwright() as p:
+        with METRICS.timer('launch'):
+            browser = await _open_browser(p)
+        try:
+            await _run_categories_with_browser(categories, browser, concurrency, force)
+        finally:
+            await browser.close()
+
+
+async def _run_categories_with_browser(categories, browser, concurrency=None, force=False):
+    limit = concurrency or _get_category_concurrency()
+    semaphore = asyncio.Semaphore(limit)
+    print(f"同時抓取 {len(categories)} 個 category（並行上限 {limit}）")
+    run_stats = NetworkStats()
+    article_cache = ArticleCache.from_env(os.environ.get('OUTPUT_DIR', 'docs'))
+    navigation = NavigationStrategy.from_env(os.environ.get('OUTPUT_DIR', 'docs'))
+    registry = ArticleRegistry()
+    scheduler = DomainScheduler.from_env()
+    for cat in categories:
+        scheduler.configure(cat['url'], cat.get('domain_max_concurrency'), cat.get('domain_rps'))
+
+    async def _run_one(cat):
+        async with semaphore:
+            # 單一 category 失敗不影響其他 category
+            try:
+                await fetch_category_with_playwright(cat, browser, run_stats, article_cache, scheduler, navigation, registry, force)
+            except Exception as e:
+                print(f"抓取 {cat.get('name')} 發生未預期錯誤: {e}")
+
+    try:
+        await asyncio.gather(*(_run_one(cat) for cat in categories))
+    finally:
+        if article_cache:
+            article_cache.close()
+        if navigation:
+            navigation.save()
+        if FIXTURE_RECORDER:
+            FIXTURE_RECORDER.save(categories)
+    print(f"本次執行網路統計: {run_stats.summary()}")
+    print(f"網域排程: {scheduler.summary()}")
+    print(f"跨 category 共用文章: {registry.shared} 次")
+    unchanged = sum(1 for cat in categories if METRICS.categories.get(cat['file'], {}).get('unchanged'))
+    print(f"列表頁未變動而略過: {unchanged}/{len(categories)} 個 category")
+    if navigation:
+        print(f"導覽策略: {navigation.summary()}")
+    print(PUBDATE_PARSER.summary())
+    METRICS.count('pubdate_fast', PUBDATE_PARSER.hits)
+    METRICS.count('pubdate_dateutil', PUBDATE_PARSER.misses)
+    METRICS.count('pubdate_failed', PUBDATE_PARSER.failures)
+
+
+# daemon 模式：常駐執行，瀏覽器、快取、導覽策略與網域排程都保持在記憶體中，
+# 每個 category 依自己的間隔輪詢。categories.json 的 poll_interval_minutes 固定間隔；
+# 未設定時依觀察到的新文章調整：有新文章時間隔減半，沒有時拉長 1.5 倍（介於上下限之間）
+DEFAULT_POLL_INTERVAL_MINUTES = 60
+DEFAULT_MIN_POLL_INTERVAL_MINUTES = 10
+DEFAULT_MAX_POLL_INTERVAL_MINUTES = 360
+POLL_INTERVAL_GROWTH = 1.5
+POLL_INTERVAL_SHRINK = 0.5
+
+
+class PollSchedule:
+    """各 category 的輪詢間隔與下次執行時間（以 heapq 作為 priority queue，時間為 time.monotonic()）"""
+
+    def __init__(self, categories, now):
+        self.min_interval = _get_float_env('POLL_MIN_INTERVAL_MINUTES', DEFAULT_MIN_POLL_INTERVAL_MINUTES) * 60
+        self.max_interval = _get_float_env('POLL_MAX_INTERVAL_MINUTES', DEFAULT_MAX_POLL_INTERVAL_MINUTES) * 60
+        initial = _get_float_env('POLL_INTERVAL_MINUTES', DEFAULT_POLL_INTERVAL_MINUTES) * 60
+        self._heap = []
+        self._seq = itertools.count()
+        self._intervals = {}
+        for cat in categories:
+            self._intervals[cat['file']] = self._fixed_interval(cat) or initial
+            # 啟動時全部立即執行一次
+            self._push(now, cat)
+
+    @staticmethod
+    def _fixed_interval(cat):
+        try:
+            minutes = float(cat.get('poll_interval_minutes') or 0)
+        except (TypeError, ValueError):
+            return None
+        return minutes * 60 if minutes > 0 else None
+
+    def _push(self, due, cat):
+        heapq.heappush(self._heap, (due, next(self._seq), cat))
+
+    def next_due(self):
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def reschedule(self, cat, added, now):
+        """依本次新增的條目數決定下次執行時間，回傳間隔秒數"""
+        interval = self._fixed_interval(cat)
+        if interval is None:
+            interval = self._intervals[cat['file']] * (POLL_INTERVAL_SHRINK if added else POLL_INTERVAL_GROWTH)
+            interval = min(self.max_interval, max(self.min_interval, interval))
+        self._intervals[cat['file']] = interval
+        self._push(now + interval, cat)
+        return interval
+
+    def summary(self):
+        return ', '.join(f"{name}: {interval / 60:.0f} 分鐘" for name, interval in sorted(self._intervals.items()))
+
+
+async def run_daemon(categories, concurrency=None, browser=None):
+    """常駐執行，直到被中斷（Ctrl+C / SIGTERM）；browser 的用法與 run_categories() 相同"""
+    if not categories:
+        print("沒有需要抓取的 category")
+        return
+    PUBDATE_PARSER.reset_counts()
+    # SIGTERM 與 Ctrl+C 相同：取消目前的 task，保存狀態後結束（Windows 不支援，略過）
+    with contextlib.suppress(NotImplementedError, RuntimeError):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    if browser is not None:
+        await _run_daemon_with_browser(categories, browser, concurrency)
+        return
+
+    from playwright.async_api import async_playwright
+    async with async_playwright() as p:
+        with METRICS.timer('launch'):
+            browser = await _open_browser(p)
+        try:
+            await _run_daemon_with_browser(categories, browser, concurrency)
+        finally:
+            await browser.close()
+
+
+async def _run_daemon_with_browser(categories, browser, concurrency=None):
+    limit = concurrency or _get_category_concurrency()
+    semaphore = asyncio.Semaphore(limit)
+    output_dir = os.environ.get('OUTPUT_DIR', 'docs')
+    run_stats = NetworkStats()
+    article_cache = ArticleCache.from_env(output_dir)
+    navigation = NavigationStrategy.from_env(output_dir)
+    scheduler = DomainScheduler.from_env()
+    for cat in categories:
+        scheduler.configure(cat['url'], cat.get('domain_max_concurrency'), cat.get('domain_rps'))
+    schedule = PollSchedule(categories, time.monotonic())
+    # 文章共用結果只在同一波（daemon 閒置前）的 category 之間共用，避免長時間累積
+    registry = ArticleRegistry()
+    running = set()
+    wake = asyncio.Event()
+    finished = 0
+    finished_since_idle = False
+    feeds_changed = False
+    print(f"daemon 模式: {len(categories)} 個 category（並行上限 {limit}）")
+
+    async def _run_one(cat):
+        nonlocal finished, finished_since_idle, feeds_changed
+        added = 0
+        async with semaphore:
+            try:
+                added = await fetch_category_with_playwright(cat, browser, run_stats, article_cache, scheduler, navigation, registry)
+            except Exception as e:
+                print(f"抓取 {cat.get('name')} 發生未預期錯誤: {e}")
+        interval = schedule.reschedule(cat, added, time.monotonic())
+        finished += 1
+        finished_since_idle = True
+        feeds_changed = feeds_changed or added > 0
+        print(f"{cat['name']} 完成（新增 {added} 條），{interval / 60:.0f} 分鐘後再次輪詢")
+
+    def _on_done(task):
+        running.discard(task)
+        wake.set()
+
+    def _idle():
+        # 目前沒有執行中的 category：保存狀態、輸出並重設本輪指標
+        nonlocal registry, finished_since_idle, feeds_changed
+        global METRICS
+        finished_since_idle = False
+        if navigation:
+            navigation.save()
+        if article_cache:
+            article_cache.evict()
+        METRICS.count('pubdate_fast', PUBDATE_PARSER.hits)
+        METRICS.count('pubdate_dateutil', PUBDATE_PARSER.misses)
+        METRICS.count('pubdate_failed', PUBDATE_PARSER.failures)
+        PUBDATE_PARSER.reset_counts()
+        write_metrics_report(output_dir)
+        if feeds_changed:
+            # 有 feed 改寫時一併更新 feeds.json，不必等到 daemon 結束
+            write_feeds_manifest(output_dir, categories)
+            feeds_changed = False
+        METRICS = RunMetrics()
+        registry = ArticleRegistry()
+        print(f"daemon 閒置: 已完成 {finished} 次，輪詢間隔 {schedule.summary()}；網域排程 {scheduler.summary()}")
+
+    try:
+        while True:
+            for cat in schedule.pop_due(time.monotonic()):
+                task = asyncio.ensure_future(_run_one(cat))
+                running.add(task)
+                task.add_done_callback(_on_done)
+            wake.clear()
+            if not running and finished_since_idle:
+                _idle()
+            next_due = schedule.next_due()
+            timeout = None if next_due is None else max(0.0, next_due - time.monotonic())
+            try:
+                await asyncio.wait_for(wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        for task in list(running):
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+        if article_cache:
+            article_cache.close()
+        if navigation:
+            navigation.save()
+        print(f"daemon 結束: 網路統計 {run_stats.summary()}")
+
+
+def write_metrics_report(output_dir, name='metrics.json'):
+    # 執行指標：METRICS_REPORT 設為 off 可停用；METRICS_PROMETHEUS 指定路徑時另外輸出 Prometheus 文字格式
+    metrics_path = os.environ.get('METRICS_REPORT') or os.path.join(output_dir, name)
+    if metrics_path.lower() not in ('off', 'false', '0'):
+        METRICS.write(metrics_path, os.environ.get('METRICS_PROMETHEUS'))
+
 
 def write_index(output_dir='docs'):
     # 根據 categories.json 生成 index，包含分類名稱和描述
     # 不包含任何動態資訊（如文章數量、時間），以避免不必要的 commit
     feeds_info = []
-    for cat in CATEGORIES:
+    for cat in get_categories():
         feeds_info.append({
             'name': cat.get('name', cat['file']),
             'file': cat['file'],
@@ -588,9 +3047,10 @@ def write_index(output_dir='docs'):
             'description': cat.get('description', '')
         })
 
-    # 寫入 index.html（完全靜態，除非 categories.json 變更否則不會改變）
+    # 寫入 index.html（完全靜態，除非 categories.json 變更否則不會改變）；先寫暫存檔，內容有變動才取代
     index_path = os.path.join(output_dir, 'index.html')
-    with open(index_path, 'w', encoding='utf-8') as fh:
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
         fh.write("<!doctype html>\n<html lang=\"zh-TW\">\n<head>\n  <meta charset=\"utf-8\" />\n  <meta name=\"viewport\" content=\"width=device-width,initial-scale=1\" />\n  <title>RSS Links - 自動產生的 RSS 訂閱源</title>\n  <style>\n    body { font-family: system-ui, -apple-system, sans-serif; max-width: 900px; margin: 40px auto; padding: 0 20px; line-height: 1.6; }\n    h1 { color: #333; }\n    .feed-item { margin: 20px 0; padding: 15px; border: 1px solid #ddd; border-radius: 8px; background: #f9f9f9; }\n    .feed-item h3 { margin: 0 0 10px 0; }\n    .feed-item a { color: #0066cc; text-decoration: none; font-weight: 500; }\n    .feed-item a:hover { text-decoration: underline; }\n    .source-url { color: #888; font-size: 0.85em; word-break: break-all; }\n    footer { margin-top: 40px; padding-top: 20px; border-top: 1px solid #ddd; color: #666; font-size: 0.9em; }\n  </style>\n</head>\n<body>\n  <h1>RSS Links</h1>\n  <p>自動產生的 RSS 訂閱源</p>\n")
         for feed in feeds_info:
             # RSS XML 檔案透過 GitHub Pages 提供（正確的 Content-Type）
@@ -603,43 +3063,239 @@ def write_index(output_dir='docs'):
                 fh.write(f"    <div class=\"source-url\">來源: <a href=\"{feed['url']}\" target=\"_blank\">{feed['url']}</a></div>\n")
             fh.write(f"  </div>\n")
         fh.write("  <footer>\n    <p>自動更新，每6小時執行一次</p>\n  </footer>\n</body>\n</html>")
-    print(f"已更新 index: {index_path}")
+    if _replace_if_changed(tmp_path, index_path):
+        print(f"已更新 index: {index_path}")
+    else:
+        print(f"index 內容無變動，不寫檔: {index_path}")
+
+
+# feeds.json：所有 feed 的整檔雜湊、大小、項目數、最新 pubDate 與壓縮檔大小。
+# 只要輪詢這個小檔案，比對雜湊就知道哪些 feed 有變動，再下載需要的（壓縮）檔案。
+# 內容不含產生時間，feed 都沒有變動時檔案也不變。
+FEEDS_MANIFEST = 'feeds.json'
+
+
+def _feed_manifest_entry(cat, output_dir):
+    path = os.path.join(output_dir, cat['file'])
+    if not os.path.exists(path):
+        return None
+    store = FeedStore.for_category(cat)
+    meta = store.load_meta()
+    size = os.path.getsize(path)
+    if meta.get('file_sha256') and meta.get('size') == size and 'items' in meta:
+        digest, count, newest = meta['file_sha256'], meta['items'], meta.get('newest')
+    else:
+        # 沒有 meta（例如由舊版產生的 XML）時讀檔計算
+        digest = _file_sha256(path)
+        items = list(store.iter_items()) if store.exists() else _load_existing_feed_items(path)
+        dates = [_format_datetime_for_feed(it['pubDate']) for it in items if it.get('pubDate')]
+        count, newest = len(items), (_format_iso8601(max(dates)) if dates else None)
+    entry = {
+        'file': cat['file'],
+        'name': cat.get('name', cat['file']),
+        'format': meta.get('format') or _get_feed_format(cat),
+        'sha256': digest,
+        'size': size,
+        'items': count,
+        'newest': newest,
+    }
+    compressed = _write_compressed_copies(path, digest, meta.get('compressed'))
+    if compressed != meta.get('compressed'):
+        store.save_meta(dict(meta, compressed=compressed))
+    for ext, encoding, _ in FEED_COMPRESSIONS:
+        if os.path.exists(path + ext):
+            entry[encoding] = {'file': cat['file'] + ext, 'size': os.path.getsize(path + ext)}
+    return entry
+
+
+def write_feeds_manifest(output_dir='docs', categories=None):
+    """產生 feeds.json（並補上缺少的壓縮檔）；先寫暫存檔，內容有變動才取代
+
+    categories 預設為 categories.json 的全部來源。
+    """
+    feeds = []
+    for cat in categories if categories is not None else get_categories():
+        entry = _feed_manifest_entry(cat, output_dir)
+        if entry:
+            feeds.append(entry)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, FEEDS_MANIFEST)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump({'version': 1, 'feeds': feeds}, fh, ensure_ascii=False, indent=2)
+        fh.write('\n')
+    if _replace_if_changed(tmp_path, manifest_path):
+        print(f"已更新 feed 清單: {manifest_path} ({len(feeds)} 個 feed)")
+    else:
+        print(f"feed 清單內容無變動，不寫檔: {manifest_path}")
 
 
 def cleanup_orphaned_xml_files(output_dir='docs'):
-    """刪除 docs 中不在 categories.json 的 XML 檔案"""
+    """刪除 docs 中不在 categories.json 的 XML 檔案與對應的 feed 項目儲存"""
     import glob
 
     # 取得 categories.json 中定義的所有 XML 檔名
-    expected_files = set([cat['file'] for cat in CATEGORIES])
+    expected_files = set([cat["file"] for cat in get_categories()])
 
-    # 取得 docs 目錄中所有的 XML 檔案
+    # 取得 docs 目錄中所有的 XML 檔案與壓縮檔
     xml_files = glob.glob(os.path.join(output_dir, '*.xml'))
+    for ext, _, _ in FEED_COMPRESSIONS:
+        xml_files += glob.glob(os.path.join(output_dir, '*.xml' + ext))
 
     # 檢查並刪除多餘的檔案
     for xml_path in xml_files:
         filename = os.path.basename(xml_path)
-        if filename not in expected_files:
+        if filename.rsplit('.xml', 1)[0] + '.xml' not in expected_files:
             print(f"刪除不再需要的 XML 檔案: {xml_path}")
             try:
                 os.remove(xml_path)
             except Exception as e:
                 print(f"刪除檔案失敗 {xml_path}: {e}")
 
+    # feed 項目儲存（與 meta）也一併清理
+    expected_stores = set()
+    for cat in get_categories():
+        store = FeedStore.for_category(cat)
+        expected_stores.update((os.path.basename(store.path), os.path.basename(store.meta_path)))
+    store_dir = os.environ.get('FEED_STORE_DIR', DEFAULT_FEED_STORE_DIR)
+    for store_path in glob.glob(os.path.join(store_dir, '*.jsonl')) + glob.glob(os.path.join(store_dir, '*.meta.json')):
+        if os.path.basename(store_path) not in expected_stores:
+            print(f"刪除不再需要的 feed 項目儲存: {store_path}")
+            try:
+                os.remove(store_path)
+            except Exception as e:
+                print(f"刪除檔案失敗 {store_path}: {e}")
+
 
-if __name__ == "__main__":
+def _parse_shard(value):
+    """解析 'i/N'（i 從 1 開始），格式錯誤時丟出 ValueError"""
+    index, sep, total = (value or '').partition('/')
+    if not sep:
+        raise ValueError(f"shard 格式應為 i/N: {value!r}")
+    index, total = int(index), int(total)
+    if total < 1 or not 1 <= index <= total:
+        raise ValueError(f"shard 超出範圍: {value!r}")
+    return index, total
+
+
+def select_shard(categories, index, total):
+    """依 category 檔名的雜湊固定分配到 N 份之一，回傳第 index 份（從 1 開始）
+
+    使用 sha1 而非內建 hash()，不同機器、不同程序的分配結果都相同。
+    """
+    return [
+        cat for cat in categories
+        if int(hashlib.sha1(cat['file'].encode('utf-8')).hexdigest(), 16) % total == index - 1
+    ]
+
+
+def export_shard_files(categories, output_dir, export_dir, extra_paths=()):
+    """將這些 category 的輸出（XML、壓縮檔、儲存檔與 meta）複製到 export_dir，保留相對於目前目錄的路徑
+
+    各 shard 只上傳自己負責的檔案；若上傳整個 docs/ 與 data/，其他 shard 的 feed 會是 checkout 時的舊內容，
+    合併時可能蓋掉該 shard 剛更新的 XML 或儲存檔。
+    """
+    import shutil
+    paths = list(extra_paths)
+    for cat in categories:
+        output_path = os.path.join(output_dir, cat['file'])
+        paths.append(output_path)
+        paths.extend(output_path + ext for ext, _, _ in FEED_COMPRESSIONS)
+        store = FeedStore.for_category(cat)
+        paths.extend((store.path, store.meta_path))
+    copied = 0
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        rel = os.path.relpath(path)
+        if rel.startswith(os.pardir):
+            print(f"{path} 不在目前目錄下，無法匯出")
+            continue
+        target = os.path.join(export_dir, rel)
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+        shutil.copy2(path, target)
+        copied += 1
+    print(f"已匯出 {copied} 個檔案到 {export_dir}")
+    return copied
+
+
+def main(argv=None):
+    """命令列進入點；argv 預設為 sys.argv[1:]，回傳結束代碼"""
     out_dir = os.environ.get('OUTPUT_DIR', 'docs')
     skip_index = os.environ.get('SKIP_INDEX', 'false').lower() in ('1','true','yes')
 
-    # 執行抓取
-    for cat in CATEGORIES:
-        fetch_category_with_playwright(cat)
+    import argparse
+    parser = argparse.ArgumentParser(description='抓取 categories.json 中的來源並產生 RSS')
+    parser.add_argument('--render', action='store_true', help='不抓取，只從 feed 項目儲存重新產生 XML')
+    parser.add_argument('--shard', default=os.environ.get('SHARD'),
+                        help='只抓取 N 份中的第 i 份（格式 i/N，也可用環境變數 SHARD）；不清理也不更新 index')
+    parser.add_argument('--merge', action='store_true', help='不抓取，只清理多餘檔案並更新 index（各 shard 結果合併後執行）')
+    parser.add_argument('--export', default=os.environ.get('SHARD_EXPORT_DIR'), metavar='DIR',
+                        help='抓取後把負責的 feed、儲存檔與執行指標複製到 DIR（也可用環境變數 SHARD_EXPORT_DIR），供合併時上傳')
+    parser.add_argument('--serve-browser', nargs='?', type=int, const=DEFAULT_BROWSER_SERVE_PORT, metavar='PORT',
+                        help=f'啟動常駐瀏覽器供其他執行以 CDP 連線（預設埠 {DEFAULT_BROWSER_SERVE_PORT}），不抓取')
+    parser.add_argument('--daemon', action='store_true',
+                        help='常駐執行，依各 category 的輪詢間隔持續抓取，直到 Ctrl+C / SIGTERM')
+    parser.add_argument('--force', action='store_true',
+                        default=os.environ.get('FORCE_REFRESH', 'false').lower() in ('1', 'true', 'yes'),
+                        help='列表頁與上次相同的 category 也完整處理（也可用環境變數 FORCE_REFRESH）')
+    args = parser.parse_args(argv)
+
+    if args.serve_browser:
+        profile_dir = os.environ.get('BROWSER_PROFILE_DIR') or os.path.join(out_dir, '.cache', 'browser-profile')
+        try:
+            asyncio.run(serve_browser(args.serve_browser, profile_dir))
+        except KeyboardInterrupt:
+            pass
+        return 0
 
-    # 清理多餘的 XML 檔案
-    cleanup_orphaned_xml_files(out_dir)
+    shard = None
+    if args.shard:
+        try:
+            shard = _parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.render:
+        for cat in get_categories():
+            render_feed(cat, out_dir)
+    elif not args.merge:
+        categories = get_categories()
+        if shard:
+            categories = select_shard(categories, *shard)
+            print(f"shard {shard[0]}/{shard[1]}: {[c.get('name') for c in categories]}")
+        if args.daemon:
+            # 常駐執行；執行指標在每次閒置時輸出，停止後照常清理與更新 index
+            try:
+                asyncio.run(run_daemon(categories))
+            except (KeyboardInterrupt, asyncio.CancelledError):
+                print("daemon 已停止")
+        else:
+            # 執行抓取（共用同一個 browser，並行處理所有 category）
+            asyncio.run(run_categories(categories, force=args.force))
+
+            metrics_name = f"metrics.shard-{shard[0]}-of-{shard[1]}.json" if shard else 'metrics.json'
+            write_metrics_report(out_dir, metrics_name)
+            if args.export:
+                export_shard_files(categories, out_dir, args.export, [os.path.join(out_dir, metrics_name)])
 
-    # 更新 index.html
-    if not skip_index:
-        write_index(out_dir)
+    if shard and not args.merge:
+        # 各 shard 只寫自己的 feed；清理與 index 由合併步驟執行一次，避免互相覆蓋
+        print("shard 模式：略過清理與 index，請於合併後執行 python scraper.py --merge")
     else:
-        print("SKIP_INDEX is set; skipping generation of docs/index.html")
\ No newline at end of file
+        # 清理多餘的 XML 檔案
+        cleanup_orphaned_xml_files(out_dir)
+
+        # 更新 feeds.json（補上缺少的壓縮檔）
+        write_feeds_manifest(out_dir)
+
+        # 更新 index.html
+        if not skip_index:
+            write_index(out_dir)
+        else:
+            print("SKIP_INDEX is set; skipping generation of docs/index.html")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())